@@ -0,0 +1,198 @@
+'''
+Benchmarks for the linear-algebra helpers in hw2, hw3 and hw4, with
+np.matmul as a reference for hw4.matmul.
+
+Each helper is timed on inputs of 10 up to 10^6 elements. Record a
+baseline on a quiet machine, then compare later runs against it:
+
+  python benchmarks.py --save      # writes benchmark_baseline.json
+  python benchmarks.py             # exits with status 1 on a regression
+
+Without a baseline there is nothing to compare against, so a run
+without --save exits with status 2.
+
+A function regresses when it takes longer than threshold times its
+baseline time for the same input size.
+'''
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import timeit
+
+import numpy as np
+
+import hw2
+import hw3
+import hw4
+
+SIZES = [10, 100, 1000, 10**4, 10**5, 10**6]
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_THRESHOLD = 1.5
+
+
+def _vector(n: int) -> list:
+  return [random.uniform(-1, 1) for _ in range(n)]
+
+
+def _square(n: int) -> "list[list]":
+  #square matrix with about n entries
+  side = max(1, math.isqrt(n))
+  return [_vector(side) for _ in range(side)]
+
+
+def _setup_dot(n):
+  v1, v2 = _vector(n), _vector(n)
+  return lambda: hw2.dot(v1, v2)
+
+
+def _setup_norm(n):
+  v = _vector(n)
+  return lambda: hw2.norm(v)
+
+
+def _setup_largest_norm(n):
+  vectors = [_vector(3) for _ in range(max(1, n // 3))]
+  return lambda: hw2.largest_norm(vectors)
+
+
+def _setup_count_vectors(n):
+  vectors = [(random.randrange(max(1, n // 10)), 0) for _ in range(n)]
+  return lambda: hw3.count_vectors(vectors)
+
+
+def _setup_orthogonal_projection(n):
+  v, w = _vector(n), _vector(n)
+  return lambda: hw3.orthogonal_projection(v, w)
+
+
+def _setup_multiply(n):
+  M = _square(n)
+  v = _vector(len(M))
+  return lambda: hw4.multiply(M, v)
+
+
+def _setup_matmul(n):
+  A = np.array(_square(n))
+  return lambda: hw4.matmul(A, A)
+
+
+def _setup_matmul_tiled(n):
+  A = np.array(_square(n))
+  return lambda: hw4.matmul(A, A, tile=256)
+
+
+def _setup_numpy_matmul(n):
+  #reference for the two above: tiling should only be the default if it beats this
+  A = np.array(_square(n))
+  return lambda: np.matmul(A, A)
+
+
+def _setup_transpose(n):
+  M = _square(n)
+  return lambda: hw4.transpose(M)
+
+
+def _setup_rotate_matrix(n):
+  M = _square(n)
+  return lambda: hw4.rotate_matrix(M)
+
+
+BENCHMARKS = {
+  'hw2.dot': _setup_dot,
+  'hw2.norm': _setup_norm,
+  'hw2.largest_norm': _setup_largest_norm,
+  'hw3.count_vectors': _setup_count_vectors,
+  'hw3.orthogonal_projection': _setup_orthogonal_projection,
+  'hw4.multiply': _setup_multiply,
+  'hw4.matmul': _setup_matmul,
+  'hw4.matmul_tiled': _setup_matmul_tiled,
+  'numpy.matmul': _setup_numpy_matmul,
+  'hw4.transpose': _setup_transpose,
+  'hw4.rotate_matrix': _setup_rotate_matrix,
+}
+
+
+def time_call(func, min_time: float = 0.2, repeat: int = 5) -> float:
+  '''
+  Returns the best time in seconds of one call to func, out of
+  'repeat' rounds that each run for at least min_time seconds.
+  '''
+  timer = timeit.Timer(func)
+  number, _ = timer.autorange()
+  #autorange stops at 0.2s; scale up when a longer round was asked for
+  number = max(1, int(number * min_time / 0.2))
+  return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(names: "list[str]", sizes: "list[int]", seed: int = 0) -> dict:
+  '''
+  Returns {name: {size: seconds per call}} for the given benchmarks.
+  '''
+  results = {}
+  for name in names:
+    results[name] = {}
+    for n in sizes:
+      random.seed(seed)
+      seconds = time_call(BENCHMARKS[name](n))
+      results[name][str(n)] = seconds
+      print('%-28s n=%-8d %12.3e s' % (name, n, seconds), flush=True)
+  return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> "list[str]":
+  '''
+  Returns one message per (function, size) whose time exceeds
+  threshold times its baseline time.
+  '''
+  regressions = []
+  for name, timings in results.items():
+    for n, seconds in timings.items():
+      reference = baseline.get(name, {}).get(n)
+      if reference is not None and seconds > threshold * reference:
+        regressions.append('%s n=%s: %.3e s vs baseline %.3e s (%.2fx)'
+                           % (name, n, seconds, reference, seconds / reference))
+  return regressions
+
+
+def main(argv=None) -> int:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+  parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+  parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                      help='allowed slowdown factor before a run fails (default %(default)s)')
+  parser.add_argument('--max-size', type=int, default=SIZES[-1], help='largest input size to time')
+  parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='benchmarks to run')
+  args = parser.parse_args(argv)
+
+  baseline = None
+  if not args.save:
+    #check for the baseline first, so a gate that is not set up fails before the timing runs
+    try:
+      with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    except FileNotFoundError:
+      print('no baseline at %s; run with --save first' % args.baseline)
+      return 2
+
+  names = args.only or list(BENCHMARKS)
+  sizes = [n for n in SIZES if n <= args.max_size]
+  results = run(names, sizes)
+
+  if args.save:
+    with open(args.baseline, 'w') as f:
+      json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results},
+                f, indent=2, sort_keys=True)
+    print('saved baseline to %s' % args.baseline)
+    return 0
+
+  regressions = compare(results, baseline, args.threshold)
+  for message in regressions:
+    print('REGRESSION ' + message)
+  return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
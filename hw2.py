@@ -1,10 +1,15 @@
 #Sam Kelson HW2
+import heapq
+from itertools import islice
+
+import numpy as np
 
 def is_in_first_quadrant(vector: list) -> bool:
   '''
   Parameters
   ----------
-  - vector: length 2 list
+  - vector: length 2 list, or any indexable buffer (array.array, 
+    memoryview, numpy array)
 
   Returns
   -------
@@ -14,15 +19,85 @@ def is_in_first_quadrant(vector: list) -> bool:
   all of its entries are non-negative). Returns 
   False otherwise.
   '''
-  return vector[0] >= 0 and vector[1] >= 0
+  #only the two entries are read, so buffers are never copied
+  return bool(vector[0] >= 0 and vector[1] >= 0)
+
+
+def _as_float_array(v) -> np.ndarray:
+  '''
+  Returns v as a float64 numpy array. numpy arrays and objects that 
+  support the buffer protocol (array.array, memoryview, np.memmap) are 
+  wrapped without copying when they already hold float64 data; other 
+  dtypes and plain lists are converted.
+  '''
+  if isinstance(v, np.ndarray):
+    return v if v.dtype == np.float64 else v.astype(np.float64)
+  try:
+    #a memoryview shares the object's memory, so asarray over it is a view, not a copy
+    v = np.asarray(memoryview(v))
+  except TypeError:
+    pass
+  return np.asarray(v, dtype=np.float64)
+
+
+#plain lists and tuples up to this length are faster to loop over in Python than to convert to numpy
+_PYTHON_LOOP_MAX = 256
+
+
+def _is_short_sequence(v) -> bool:
+  return isinstance(v, (list, tuple)) and len(v) <= _PYTHON_LOOP_MAX
+
+
+def _is_contiguous_float64(a: np.ndarray) -> bool:
+  return a.ndim == 1 and a.dtype == np.float64 and a.flags.c_contiguous
+
+
+def batch_dot(V1: np.ndarray, V2: np.ndarray) -> np.ndarray:
+  '''
+  Parameters
+  ----------
+  - V1: 2-D array or buffer, one vector per row
+  - V2: 2-D array or buffer with the same shape as V1
+
+  Returns
+  -------
+  np.ndarray
+
+  Returns the dot product of every pair of rows of V1 and V2 
+  in a single vectorized pass. 1-D inputs are treated as a 
+  batch of one vector.
+  '''
+  V1 = np.atleast_2d(_as_float_array(V1))
+  V2 = np.atleast_2d(_as_float_array(V2))
+  if V1.shape != V2.shape:
+    raise ValueError("batch_dot needs arrays of the same shape, got %s and %s" % (V1.shape, V2.shape))
+  #einsum multiplies and sums row by row without building the V1*V2 temporary
+  return np.einsum('ij,ij->i', V1, V2)
+
+
+def batch_norm(V: np.ndarray) -> np.ndarray:
+  '''
+  Parameters
+  ----------
+  - V: 2-D array or buffer, one vector per row
+
+  Returns
+  -------
+  np.ndarray
+
+  Returns the Euclidean norm of every row of V in a single 
+  vectorized pass. A 1-D input is treated as a batch of one vector.
+  '''
+  V = np.atleast_2d(_as_float_array(V))
+  return np.sqrt(np.einsum('ij,ij->i', V, V))
 
 
 def dot(v1: list, v2: list) -> float:
   '''
   Parameters
   ----------
-  - v1: list
-  - v2: list
+  - v1: list or buffer (array.array, memoryview, numpy array)
+  - v2: list or buffer of the same length
 
   Returns
   -------
@@ -30,17 +105,25 @@ def dot(v1: list, v2: list) -> float:
 
   Returns the dot product of v1 and v2
   '''
-  result = 0.0
-  for element in range(0,len(v1)):
-    result += v1[element]*v2[element]
-  return result
+  if _is_short_sequence(v1) and _is_short_sequence(v2):
+    result = 0.0
+    for element in range(0,len(v1)):
+      result += v1[element]*v2[element]
+    return result
+
+  v1 = _as_float_array(v1)
+  v2 = _as_float_array(v2)
+  #contiguous float64 vectors go straight to BLAS
+  if _is_contiguous_float64(v1) and _is_contiguous_float64(v2) and len(v1) == len(v2):
+    return float(np.dot(v1, v2))
+  return float(batch_dot(v1, v2)[0])
 
 
 def norm(v: list) -> float:
   '''
   Parameters
   ----------
-  - v: list
+  - v: list or buffer (array.array, memoryview, numpy array)
 
   Returns
   -------
@@ -48,10 +131,17 @@ def norm(v: list) -> float:
 
   Returns the Euclidean norm of v
   '''
-  result = 0.0
-  for element in range(0,len(v)):
-    result += v[element]**2
-  return result**(1/2)
+  if _is_short_sequence(v):
+    result = 0.0
+    for element in range(0,len(v)):
+      result += v[element]**2
+    return result**(1/2)
+
+  v = _as_float_array(v)
+  #contiguous float64 vectors go straight to BLAS
+  if _is_contiguous_float64(v):
+    return float(np.sqrt(np.dot(v, v)))
+  return float(batch_norm(v)[0])
 
 
 def largest_norm(vectors: "list[list]") -> list:
@@ -68,8 +158,67 @@ def largest_norm(vectors: "list[list]") -> list:
   of all the vectors in 'vectors'. In case of a tie, returns 
   the first vector in the list.
   '''
-  result = vectors[0]
-  for vector in range(0,len(vectors)):
-    if norm(vectors[vector]) > norm(result):
-      result = vectors[vector]
-  return result
+  return largest_norms(vectors, 1)[0]
+
+
+def _norm_chunks(vectors, chunk_size: int):
+  '''
+  Yields (chunk, norms) pairs covering 'vectors' in order. 2-D arrays 
+  (including np.memmap) are sliced so only one chunk is ever loaded; 
+  any other iterable is consumed chunk_size items at a time.
+  '''
+  if isinstance(vectors, np.ndarray) and vectors.ndim == 2:
+    for start in range(0, len(vectors), chunk_size):
+      chunk = vectors[start:start+chunk_size]
+      yield chunk, batch_norm(chunk)
+    return
+
+  iterator = iter(vectors)
+  while True:
+    chunk = list(islice(iterator, chunk_size))
+    if not chunk:
+      return
+    #vectors of different lengths cannot be stacked, so fall back to one norm per vector
+    if len({len(vector) for vector in chunk}) == 1:
+      norms = batch_norm(chunk)
+    else:
+      norms = [norm(vector) for vector in chunk]
+    yield chunk, norms
+
+
+def largest_norms(vectors, k: int, chunk_size: int = 65536) -> list:
+  '''
+  Parameters
+  ----------
+  - vectors: any iterable of vectors (list, generator, 2-D array or 
+    np.memmap)
+  - k: number of vectors to keep
+  - chunk_size: number of vectors whose norms are computed together
+
+  Returns
+  -------
+  list
+
+  Returns the k vectors with the largest norms, largest first. The 
+  input is consumed chunk by chunk and only a heap of k vectors is 
+  kept, so 'vectors' does not need to fit in memory. Every norm is 
+  computed once. In case of a tie, the vector that came first wins.
+  '''
+  if k < 1:
+    raise ValueError("k must be at least 1")
+
+  #min-heap of (norm, -position, vector); the smallest entry is evicted first, so among equal norms the later vector goes first
+  heap = []
+  position = 0
+  for chunk, norms in _norm_chunks(vectors, chunk_size):
+    for vector, vector_norm in zip(chunk, norms):
+      entry = (float(vector_norm), -position, vector)
+      if len(heap) < k:
+        heapq.heappush(heap, entry)
+      elif entry[:2] > heap[0][:2]:
+        heapq.heapreplace(heap, entry)
+      position += 1
+
+  if not heap:
+    raise ValueError("largest_norms needs at least one vector")
+  return [entry[2] for entry in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
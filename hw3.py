@@ -1,3 +1,10 @@
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+
 '''
 Use this space to copy and paste functions you wrote in 
 the last class. For example:
@@ -24,42 +31,62 @@ def dot(v1: list, v2: list) -> float:
 
 # solution starts here:
 
-def is_scalar_multiple(v1, v2):
+def is_scalar_multiple(v1, v2, rtol=1e-9):
   '''
   Parameters
   ----------
   - v1: list
   - v2: list
+  - rtol: relative tolerance (see are_scalar_multiples)
 
   Returns
   -------
   True if v1 and v2 are linearly dependent, and False otherwise
   '''
   
-  #basicly: go through each element of v1 and v2 and check if the same scalar multiple can be applied to each element to make them equal
-
   #if the vectors are not the same length, they cannot be scalar multiples
   if len(v1) != len(v2):
     return False
-  
-  #check if either vector is all zeros
-  for vec in [v1,v2]:
-    allZero = True
-    for i in vec:
-      if i != 0:
-        allZero = False
-        break
-    if allZero:
-      return True
-
-  for i in range(len(v1)):
-    if v1[i] == 0 and v2[i] == 0:
-      continue
-    if v1[i] == 0 or v2[i] == 0:
-      return False
-    if v1[0] / v2[0] != v1[i] / v2[i]:
-      return False
-  return True
+  if len(v1) == 0:
+    return True
+
+  return bool(are_scalar_multiples([v1], [v2], rtol)[0])
+
+def are_scalar_multiples(V1, V2, rtol=1e-9):
+  '''
+  Parameters
+  ----------
+  - V1: 2-D array, one vector per row
+  - V2: 2-D array with the same shape as V1
+  - rtol: relative tolerance; 0 asks for exact linear dependence
+
+  Returns
+  -------
+  np.ndarray of bools, True where row i of V1 and row i of V2 are 
+  linearly dependent
+
+  Each pair is stacked into a 2xd matrix and tested for rank <= 1. 
+  Pivoting on the largest entry of the V1 row, the pair is dependent 
+  exactly when every 2x2 minor that uses the pivot column vanishes, 
+  so only d minors per pair are needed. A minor counts as zero when 
+  it is at most rtol * max|v1| * max|v2|. Zero vectors are multiples 
+  of everything.
+  '''
+
+  V1 = np.atleast_2d(np.asarray(V1, dtype=np.float64))
+  V2 = np.atleast_2d(np.asarray(V2, dtype=np.float64))
+  if V1.shape != V2.shape:
+    raise ValueError("are_scalar_multiples needs arrays of the same shape, got %s and %s" % (V1.shape, V2.shape))
+
+  rows = np.arange(len(V1))
+  pivot = np.argmax(np.abs(V1), axis=1)
+  p1 = V1[rows, pivot][:, None]
+  p2 = V2[rows, pivot][:, None]
+
+  #minors p1*v2_j - v1_j*p2 for every column j
+  minors = p1*V2 - V1*p2
+  scale = np.abs(p1[:, 0]) * np.max(np.abs(V2), axis=1, initial=0.0)
+  return np.max(np.abs(minors), axis=1, initial=0.0) <= rtol*scale
 
 def count_vectors(vectors):
   '''
@@ -78,16 +105,162 @@ def count_vectors(vectors):
     = {(1,0) : 2, (2,3) : 1, (0,0): 1, (0,): 1}
   '''
   
-  #start by creating dictionary
-  dict = {}
+  return VectorCounter().update(vectors).to_dict()
 
-  #go through vecs and put into dict depending on if the vec is already there or not
-  for vec in vectors:
-    if vec not in dict:
-      dict[vec] = 1
-    else:
-      dict[vec] += 1
-  return dict
+class VectorCounter:
+  '''
+  Streaming version of count_vectors.
+
+  With capacity=None every distinct vector gets an exact count. With a 
+  capacity, at most that many counters are kept (the space-saving 
+  heavy-hitters algorithm): when a new vector arrives and the table is 
+  full, the vector with the smallest count is evicted and the newcomer 
+  inherits that count. Any vector that occurs more than 
+  total/capacity times is guaranteed to be kept, and every kept count 
+  overestimates the truth by at most error(vector).
+
+  Counters are plain picklable objects, so worker processes can each 
+  count one shard of the stream and the results can be merged:
+
+  def count_shard(part):
+    return VectorCounter(capacity=1000).update(part)
+
+  total = VectorCounter.merge_all(pool.map(count_shard, parts))
+  '''
+
+  def __init__(self, capacity=None):
+    if capacity is not None and capacity < 1:
+      raise ValueError("capacity must be at least 1")
+    self.capacity = capacity
+    self.total = 0
+    self._counts = {}
+    #overestimate carried over from evicted vectors (space-saving mode only)
+    self._errors = {}
+    #min-heap of (count, tiebreak, vector); stale entries are skipped lazily
+    self._heap = []
+    self._pushes = 0
+
+  def update(self, vectors):
+    '''
+    Counts every vector of the iterable and returns self.
+    '''
+    counts = self._counts
+    if self.capacity is None:
+      for vec in vectors:
+        counts[vec] = counts.get(vec, 0) + 1
+        self.total += 1
+      return self
+
+    for vec in vectors:
+      self.total += 1
+      if vec in counts:
+        counts[vec] += 1
+      elif len(counts) < self.capacity:
+        counts[vec] = 1
+        self._errors[vec] = 0
+      else:
+        smallest, smallest_count = self._pop_smallest()
+        del counts[smallest]
+        del self._errors[smallest]
+        counts[vec] = smallest_count + 1
+        self._errors[vec] = smallest_count
+      self._push(vec)
+    return self
+
+  def _push(self, vec):
+    self._pushes += 1
+    heapq.heappush(self._heap, (self._counts[vec], self._pushes, vec))
+    #the heap gets one entry per increment; rebuild it before stale entries pile up
+    if len(self._heap) > 4*self.capacity:
+      self._rebuild_heap()
+
+  def _rebuild_heap(self):
+    self._heap = [(c, i, vec) for i, (vec, c) in enumerate(self._counts.items())]
+    self._pushes = len(self._heap)
+    heapq.heapify(self._heap)
+
+  def _pop_smallest(self):
+    while True:
+      c, _, vec = heapq.heappop(self._heap)
+      if self._counts.get(vec) == c:
+        return vec, c
+
+  def __getitem__(self, vec):
+    return self._counts.get(vec, 0)
+
+  def __len__(self):
+    return len(self._counts)
+
+  def error(self, vec):
+    '''
+    Returns how much the count of vec may overestimate the truth 
+    (always 0 in exact mode).
+    '''
+    return self._errors.get(vec, 0)
+
+  def to_dict(self):
+    '''
+    Returns a dictionary of the kept vectors and their counts.
+    '''
+    return dict(self._counts)
+
+  def most_common(self, n=None):
+    '''
+    Returns a list of (vector, count) pairs, largest count first.
+    '''
+    pairs = sorted(self._counts.items(), key=lambda pair: pair[1], reverse=True)
+    return pairs if n is None else pairs[:n]
+
+  def merge(self, other):
+    '''
+    Adds the counts of another counter (for example one built on a 
+    different shard) into this one and returns self. Merging exact 
+    counters is exact. Merging bounded counters follows the mergeable 
+    space-saving summary: a vector missing from a full counter is given 
+    that counter's smallest count as an upper bound, and only the 
+    largest capacity counts are kept.
+    '''
+    if self.capacity is None and other.capacity is None:
+      for vec, c in other._counts.items():
+        self._counts[vec] = self._counts.get(vec, 0) + c
+      self.total += other.total
+      return self
+
+    capacity = min(c for c in (self.capacity, other.capacity) if c is not None)
+    self_floor = self._floor()
+    other_floor = other._floor()
+    counts = {}
+    errors = {}
+    for vec in self._counts.keys() | other._counts.keys():
+      counts[vec] = self._counts.get(vec, self_floor) + other._counts.get(vec, other_floor)
+      errors[vec] = self._errors.get(vec, self_floor) + other._errors.get(vec, other_floor)
+
+    kept = heapq.nlargest(capacity, counts, key=counts.get)
+    self.capacity = capacity
+    self.total += other.total
+    self._counts = {vec: counts[vec] for vec in kept}
+    self._errors = {vec: errors[vec] for vec in kept}
+    self._rebuild_heap()
+    return self
+
+  def _floor(self):
+    #smallest count of a full bounded counter; any unseen vector may have occurred this often
+    if self.capacity is None or len(self._counts) < self.capacity:
+      return 0
+    return min(self._counts.values())
+
+  @classmethod
+  def merge_all(cls, counters):
+    '''
+    Merges an iterable of counters into a new counter.
+    '''
+    counters = list(counters)
+    if not counters:
+      return cls()
+    result = cls(counters[0].capacity).merge(counters[0])
+    for counter in counters[1:]:
+      result.merge(counter)
+    return result
 
 def reverse_dictionary(d):
   '''
@@ -105,23 +278,114 @@ def reverse_dictionary(d):
     ={a : 1, b: [2,3]}
   '''
   
-  #grab the list of keys which will become the values of the new dict
-  keys = list(d.keys())
-  #grab the list of values which will become the keys of the new dict
-  values = list(d.values())
+  return _invert(d.items())
+
+def _invert(items):
+  #one pass over (key, value) pairs; keys keep their order within each list
+  inverse = {}
+  for key, value in items:
+    if value in inverse:
+      inverse[value].append(key)
+    else:
+      inverse[value] = [key]
+  return inverse
 
-  #create new dict
-  new_dict = {}
+class ReverseIndex:
+  '''
+  reverse_dictionary that stays in step with its dictionary.
+
+  The index wraps the forward dictionary d (without copying it) and is 
+  built in one pass. Changes made through set() and delete() update 
+  both d and the index, so it never has to be rebuilt:
+
+  index = ReverseIndex({1: 'a', 2: 'b'})
+  index.set(3, 'b')
+  index['b']
+    = [2, 3]
+
+  Removing a key costs time proportional to the number of keys that 
+  share its value.
+  '''
+
+  def __init__(self, d=None, _inverse=None):
+    self.forward = {} if d is None else d
+    self._inverse = _invert(self.forward.items()) if _inverse is None else _inverse
+
+  @classmethod
+  def build_parallel(cls, d, shards=4, executor=None):
+    '''
+    Builds the index by inverting shards of d's keys in parallel and 
+    merging the partial results in shard order, so the lists come out 
+    the same as reverse_dictionary(d). Uses a process pool with one 
+    worker per shard unless an executor is given; each shard's items 
+    are pickled to its worker.
+    '''
+    if shards < 1:
+      raise ValueError("shards must be at least 1")
+    shard_size = max(1, -(-len(d) // shards))
+    items = iter(d.items())
+    parts = iter(lambda: list(islice(items, shard_size)), [])
 
-  # and new keys to the new dict
-  for value in values:
-    new_dict[value] = []
+    inverse = {}
+    if executor is None:
+      with ProcessPoolExecutor(max_workers=shards) as pool:
+        partials = list(pool.map(_invert, parts))
+    else:
+      partials = executor.map(_invert, parts)
+    for partial in partials:
+      for value, keys in partial.items():
+        if value in inverse:
+          inverse[value].extend(keys)
+        else:
+          inverse[value] = keys
+    return cls(d, _inverse=inverse)
+
+  def __getitem__(self, value):
+    return self._inverse[value]
+
+  def get(self, value, default=None):
+    return self._inverse.get(value, default)
+
+  def __contains__(self, value):
+    return value in self._inverse
+
+  def __len__(self):
+    return len(self._inverse)
+
+  def set(self, key, value):
+    '''
+    Sets d[key] = value and moves key to value's list.
+    '''
+    if key in self.forward:
+      old = self.forward[key]
+      if old == value:
+        self.forward[key] = value
+        return
+      self._remove(key, old)
+    self.forward[key] = value
+    if value in self._inverse:
+      self._inverse[value].append(key)
+    else:
+      self._inverse[value] = [key]
 
-  #populate new dict with old dict keys
-  for key in keys:
-    new_dict[d[key]].append(key)
+  def delete(self, key):
+    '''
+    Deletes d[key] and removes key from the index. Raises KeyError if 
+    key is not in d.
+    '''
+    self._remove(key, self.forward.pop(key))
 
-  return new_dict
+  def _remove(self, key, value):
+    keys = self._inverse[value]
+    keys.remove(key)
+    if not keys:
+      del self._inverse[value]
+
+  def to_dict(self):
+    '''
+    Returns the reversed dictionary, as reverse_dictionary would.
+    '''
+    return {value: list(keys) for value, keys in self._inverse.items()}
 
 def normalize(v):
   '''
@@ -133,20 +397,57 @@ def normalize(v):
   -------
   - normalized_v: list
 
-  Returns v/|v|
+  Returns v/|v| as a new list; v itself is left unchanged. 
+  A zero vector is returned as a copy.
   '''
 
   #find the magnitude of the vector
   magnitude = dot(v,v)**0.5
 
   if magnitude == 0 or magnitude == 1:
-    return v
+    return list(v)
 
   #divide each element by magnitude
-  for i in range(len(v)):
-    v[i] = v[i]/magnitude
+  return [element/magnitude for element in v]
+
+def batch_normalize(V, out=None, dtype=np.float64, zero='keep'):
+  '''
+  Parameters
+  ----------
+  - V: 2-D array, one vector per row
+  - out: optional array of V's shape to write the result into (it 
+    may be V itself); its dtype overrides dtype
+  - dtype: np.float32 or np.float64, the dtype of a newly allocated result
+  - zero: what to do with zero rows: 'keep' leaves them as zeros, 
+    'nan' fills them with nan, 'raise' raises a ValueError
+
+  Returns
+  -------
+  - normalized_V: np.ndarray (out, if it was given)
+
+  Returns every row of V divided by its norm. V is not modified 
+  unless it is passed as out.
+  '''
+
+  if zero not in ('keep', 'nan', 'raise'):
+    raise ValueError("zero must be 'keep', 'nan' or 'raise', got %r" % (zero,))
+  V = np.asarray(V)
+  if V.ndim != 2:
+    raise ValueError("batch_normalize needs a 2-D array, got %d dimensions" % V.ndim)
+  if out is None:
+    out = np.empty(V.shape, dtype=dtype)
+  elif out.shape != V.shape:
+    raise ValueError("out has shape %s but V has shape %s" % (out.shape, V.shape))
 
-  return v
+  #row norms in the output precision, without building a V*V temporary
+  norms = np.sqrt(np.einsum('ij,ij->i', V, V, dtype=out.dtype, casting='same_kind'))
+  zero_rows = norms == 0
+  if zero == 'raise' and zero_rows.any():
+    raise ValueError("V has %d zero rows" % np.count_nonzero(zero_rows))
+
+  np.divide(V, norms[:, None], out=out, where=~zero_rows[:, None], casting='same_kind')
+  out[zero_rows] = np.nan if zero == 'nan' else 0
+  return out
 
 def orthogonal_projection(v, w):
   '''
@@ -164,10 +465,193 @@ def orthogonal_projection(v, w):
     3. y is perpendicular to w
   '''
   
-  #get parallel vect by multiplying the norm of w by the dot product of v and w
-  parrel_vector = [i*dot(v,w) for i in normalize(w)]
+  #get parallel vect by multiplying the normalized w by the dot product of v and the normalized w
+  unit_w = normalize(w)
+  scale = dot(v, unit_w)
+  parrel_vector = [i*scale for i in unit_w]
 
   #get perpendic vect by subtracting the parallel vect from v
   perpendic_vector = [v[i] - parrel_vector[i] for i in range(len(v))]
 
-  return parrel_vector, perpendic_vector
\ No newline at end of file
+  return parrel_vector, perpendic_vector
+
+def batch_orthogonal_projection(V, w):
+  '''
+  Parameters
+  ----------
+  - V: 2-D array, one vector per row
+  - w: list (nonzero)
+
+  Returns
+  -------
+  Two arrays X and Y of V's shape such that, row by row:
+    1. V = X + Y
+    2. the rows of X are parallel to w
+    3. the rows of Y are perpendicular to w
+  '''
+
+  V = np.atleast_2d(np.asarray(V, dtype=np.float64))
+  unit_w = np.asarray(normalize(w), dtype=np.float64)
+  #one mat-vec gives every coefficient, one outer product every parallel part
+  parallel = np.outer(V @ unit_w, unit_w)
+  return parallel, V - parallel
+
+class SubspaceProjector:
+  '''
+  Orthogonal projection onto the subspace spanned by the rows of a 
+  basis. The basis is orthonormalized once with a QR factorization 
+  and the result is kept, so projecting many batches onto the same 
+  subspace costs two matrix products per batch:
+
+  projector = SubspaceProjector([[1, 0, 0], [1, 1, 0]])
+  X, Y = projector.project([[1, 2, 3]])
+    X = [[1, 2, 0]], Y = [[0, 0, 3]]
+  '''
+
+  def __init__(self, basis, rtol=1e-10):
+    basis = np.atleast_2d(np.asarray(basis, dtype=np.float64))
+    if basis.shape[0] > basis.shape[1]:
+      raise ValueError("%d vectors cannot be independent in dimension %d" % basis.shape)
+    Q, R = np.linalg.qr(basis.T)
+    diagonal = np.abs(np.diag(R))
+    if diagonal.size == 0 or diagonal.min() <= rtol*diagonal.max():
+      raise ValueError("basis vectors are linearly dependent")
+    #columns of Q are an orthonormal basis of the subspace
+    self.Q = Q
+
+  @property
+  def dimension(self):
+    return self.Q.shape[1]
+
+  def coefficients(self, V):
+    '''
+    Returns the coordinates of the projection of every row of V in the 
+    orthonormal basis, an array of shape (len(V), dimension).
+    '''
+    return np.atleast_2d(np.asarray(V, dtype=np.float64)) @ self.Q
+
+  def project(self, V):
+    '''
+    Returns (X, Y) where the rows of X are the projections of the rows 
+    of V onto the subspace and Y = V - X is perpendicular to it.
+    '''
+    V = np.atleast_2d(np.asarray(V, dtype=np.float64))
+    parallel = (V @ self.Q) @ self.Q.T
+    return parallel, V - parallel
+
+@lru_cache(maxsize=32)
+def _cached_projector(basis_bytes, shape):
+  return SubspaceProjector(np.frombuffer(basis_bytes, dtype=np.float64).reshape(shape))
+
+def project_onto_subspace(V, basis):
+  '''
+  Parameters
+  ----------
+  - V: 2-D array, one vector per row
+  - basis: 2-D array whose rows span the subspace
+
+  Returns
+  -------
+  (X, Y) as returned by SubspaceProjector.project. The projector of 
+  each recently used basis is cached, so repeated calls with the same 
+  basis skip the QR factorization.
+  '''
+
+  basis = np.ascontiguousarray(np.atleast_2d(basis), dtype=np.float64)
+  return _cached_projector(basis.tobytes(), basis.shape).project(V)
+
+class DirectionIndex:
+  '''
+  Buckets vectors by canonical direction so that finding every vector 
+  collinear with a given one is a dict lookup instead of a pairwise 
+  is_scalar_multiple scan.
+
+  The canonical direction of v is normalize(v), quantized to a grid of 
+  spacing tol, with the sign flipped so the first nonzero grid entry is 
+  positive (v and -v share a bucket). Zero vectors share their own 
+  bucket. Directions that differ by less than tol usually share a 
+  bucket, but two that straddle a grid line can land in neighbours.
+
+  For example:
+  index = DirectionIndex()
+  a = index.insert([1, 2])
+  b = index.insert([-2, -4])
+  index.collinear([3, 6])
+    = [a, b]
+  '''
+
+  def __init__(self, tol=1e-6):
+    if tol <= 0:
+      raise ValueError("tol must be positive")
+    self.tol = tol
+    #bucket key -> {id: None}, a dict so ids stay in insertion order
+    self._buckets = {}
+    #id -> (bucket key, vector)
+    self._entries = {}
+    self._next_id = 0
+
+  def direction_key(self, v):
+    '''
+    Returns the hashable bucket key of v.
+    '''
+    unit = np.asarray(normalize(v), dtype=np.float64)
+    grid = np.round(unit / self.tol).astype(np.int64)
+    nonzero = np.flatnonzero(grid)
+    if len(nonzero) == 0:
+      return ('zero', len(grid))
+    #np.round is symmetric, so negating the grid of v gives exactly the grid of -v
+    if grid[nonzero[0]] < 0:
+      grid = -grid
+    return tuple(grid.tolist())
+
+  def insert(self, v):
+    '''
+    Adds v to the index and returns its id.
+    '''
+    key = self.direction_key(v)
+    vector_id = self._next_id
+    self._next_id += 1
+    self._buckets.setdefault(key, {})[vector_id] = None
+    self._entries[vector_id] = (key, v)
+    return vector_id
+
+  def remove(self, vector_id):
+    '''
+    Removes the vector with the given id. Raises KeyError if it is 
+    not in the index.
+    '''
+    key, _ = self._entries.pop(vector_id)
+    bucket = self._buckets[key]
+    del bucket[vector_id]
+    if not bucket:
+      del self._buckets[key]
+
+  def __getitem__(self, vector_id):
+    return self._entries[vector_id][1]
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, vector_id):
+    return vector_id in self._entries
+
+  def collinear(self, v):
+    '''
+    Returns the ids of the indexed vectors that point along v (in 
+    either direction), in insertion order.
+    '''
+    return list(self._buckets.get(self.direction_key(v), ()))
+
+  def stats(self):
+    '''
+    Returns a dictionary with the number of vectors and buckets and 
+    the smallest, largest and mean bucket size.
+    '''
+    sizes = [len(bucket) for bucket in self._buckets.values()]
+    return {
+      'vectors': len(self._entries),
+      'buckets': len(sizes),
+      'min_bucket': min(sizes, default=0),
+      'max_bucket': max(sizes, default=0),
+      'mean_bucket': len(self._entries) / len(sizes) if sizes else 0.0,
+    }
@@ -1,3 +1,9 @@
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+
 import numpy as np
 
 '''
@@ -23,12 +29,193 @@ def dot(v1: list, v2: list) -> float:
     result += v1[element]*v2[element]
   return result
 
-def multiply(M: "list[list]", v: list) -> list:
+def matmul(A: "list[list]", B: "list[list]", tile: int = None, workers: int = None) -> "list[list]":
+  '''
+  Parameters
+  ----------
+  - A: list of lists or 2-D numpy array (n x k)
+  - B: list of lists or 2-D numpy array (k x m)
+  - tile: side length of the output tiles for numpy inputs
+  - workers: number of threads for the tiles (default: one per core 
+    when tile is given)
+
+  Returns
+  -------
+  The matrix product AB. A numpy array if A or B is one, otherwise 
+  a list of lists.
+
+  By default numpy inputs are one np.matmul call, which BLAS already 
+  spreads over the cores. Giving tile or workers cuts the output into 
+  tile x tile blocks (256 if only workers is given), each one BLAS 
+  product of a strip of A and a strip of B, run on a thread pool that 
+  is kept for later calls. NumPy releases the GIL during each product, 
+  so the blocks run in parallel; with threadpoolctl installed each 
+  block's BLAS call is limited to one thread, otherwise a 
+  multithreaded BLAS runs workers x cores threads. Run 
+  `python benchmarks.py --only hw4.matmul hw4.matmul_tiled` to see 
+  whether tiling pays off on a machine. Lists use a pure-Python 
+  fallback in row order that keeps exact integer arithmetic.
+  '''
+
+  if isinstance(A, np.ndarray) or isinstance(B, np.ndarray):
+    A, B = np.asarray(A), np.asarray(B)
+    if tile is None and workers is None:
+      if A.ndim != 2 or B.ndim != 2 or A.shape[1] != B.shape[0]:
+        raise ValueError("cannot multiply matrices of shapes %s and %s" % (A.shape, B.shape))
+      return np.matmul(A, B)
+    return _matmul_tiled(A, B, tile or 256, workers)
+  return _matmul_python(A, B)
+
+def _matmul_python(A: "list[list]", B: "list[list]") -> "list[list]":
+  if A and len(A[0]) != len(B):
+    raise ValueError("cannot multiply a matrix with %d columns by one with %d rows" % (len(A[0]), len(B)))
+  n_cols = len(B[0]) if B else 0
+  if n_cols == 1:
+    #a single column is a dot product per row; the row-update loop below would build a one-element list per entry
+    column = [b_row[0] for b_row in B]
+    return [[dot(a_row, column)] for a_row in A]
+  result = []
+  #i-k-j order: each entry of a row of A scales a whole row of B, so B is read row by row
+  for a_row in A:
+    acc = [0]*n_cols
+    for a, b_row in zip(a_row, B):
+      acc = [c + a*b for c, b in zip(acc, b_row)]
+    result.append(acc)
+  return result
+
+#one thread pool per worker count, kept alive across calls to matmul
+_thread_pools = {}
+
+def _thread_pool(workers: int) -> ThreadPoolExecutor:
+  pool = _thread_pools.get(workers)
+  if pool is None:
+    pool = _thread_pools[workers] = ThreadPoolExecutor(max_workers=workers)
+  return pool
+
+def _single_threaded_blas():
+  #context manager limiting BLAS to one thread per call, if threadpoolctl is installed
+  try:
+    from threadpoolctl import threadpool_limits
+  except ImportError:
+    return contextlib.nullcontext()
+  return threadpool_limits(limits=1, user_api='blas')
+
+def _matmul_tiled(A: np.ndarray, B: np.ndarray, tile: int, workers: int) -> np.ndarray:
+  if A.ndim != 2 or B.ndim != 2 or A.shape[1] != B.shape[0]:
+    raise ValueError("cannot multiply matrices of shapes %s and %s" % (A.shape, B.shape))
+  if tile < 1:
+    raise ValueError("tile must be at least 1")
+  n, m = A.shape[0], B.shape[1]
+  C = np.empty((n, m), dtype=np.result_type(A, B))
+  blocks = [(i, j) for i in range(0, n, tile) for j in range(0, m, tile)]
+
+  def multiply_block(block):
+    i, j = block
+    np.matmul(A[i:i+tile], B[:, j:j+tile], out=C[i:i+tile, j:j+tile])
+
+  workers = workers or os.cpu_count() or 1
+  if workers == 1 or len(blocks) <= 1:
+    for block in blocks:
+      multiply_block(block)
+  else:
+    with _single_threaded_blas():
+      #list() re-raises any exception from a block
+      list(_thread_pool(workers).map(multiply_block, blocks))
+  return C
+
+class CSRMatrix:
+  '''
+  Sparse matrix in compressed sparse row form. Only the nonzero 
+  entries are stored, in three numpy arrays:
+  - data: the nonzero values, row by row
+  - indices: the column of each value in data
+  - indptr: row i is data[indptr[i]:indptr[i+1]]
+
+  The transpose of a CSR matrix has the same arrays as the compressed 
+  sparse column form of the original, so transpose() also serves as 
+  the CSC conversion. multiply and transpose accept CSRMatrix directly.
+  '''
+  __slots__ = ('data', 'indices', 'indptr', 'shape')
+
+  def __init__(self, data, indices, indptr, shape):
+    self.data = np.asarray(data, dtype=np.float64)
+    self.indices = np.asarray(indices, dtype=np.int64)
+    self.indptr = np.asarray(indptr, dtype=np.int64)
+    self.shape = (int(shape[0]), int(shape[1]))
+    if len(self.indptr) != self.shape[0] + 1 or len(self.data) != len(self.indices) or self.indptr[-1] != len(self.data):
+      raise ValueError("inconsistent CSR arrays for shape %s" % (self.shape,))
+
+  @classmethod
+  def from_dense(cls, M) -> "CSRMatrix":
+    '''
+    Builds a CSRMatrix from a list of lists or a 2-D array.
+    '''
+    M = np.asarray(M, dtype=np.float64)
+    if M.ndim != 2:
+      raise ValueError("CSRMatrix needs a 2-D matrix, got %d dimensions" % M.ndim)
+    rows, cols = np.nonzero(M)
+    indptr = np.zeros(M.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=M.shape[0]), out=indptr[1:])
+    return cls(M[rows, cols], cols, indptr, M.shape)
+
+  @property
+  def nnz(self) -> int:
+    return len(self.data)
+
+  def _row_ids(self) -> np.ndarray:
+    #row of every stored value
+    return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+  def to_dense(self) -> np.ndarray:
+    M = np.zeros(self.shape)
+    M[self._row_ids(), self.indices] = self.data
+    return M
+
+  def tolist(self) -> "list[list]":
+    return self.to_dense().tolist()
+
+  def matvec(self, v) -> np.ndarray:
+    '''
+    Returns the vector Mv as an array, in O(nnz) time.
+    '''
+    v = np.asarray(v, dtype=np.float64)
+    if v.shape != (self.shape[1],):
+      raise ValueError("vector of length %d does not match matrix of shape %s" % (len(v), self.shape))
+    result = np.bincount(self._row_ids(), weights=self.data * v[self.indices], minlength=self.shape[0])
+    #bincount returns integers when the matrix has no stored values
+    return result.astype(np.float64, copy=False)
+
+  def __matmul__(self, v) -> np.ndarray:
+    return self.matvec(v)
+
+  def transpose(self) -> "CSRMatrix":
+    '''
+    Returns the transpose as a new CSRMatrix, in O(nnz) memory.
+    '''
+    #stable sort by column keeps the rows in order within each new row
+    order = np.argsort(self.indices, kind='stable')
+    indptr = np.zeros(self.shape[1] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(self.indices, minlength=self.shape[1]), out=indptr[1:])
+    return CSRMatrix(self.data[order], self._row_ids()[order], indptr, (self.shape[1], self.shape[0]))
+
+  @property
+  def T(self) -> "CSRMatrix":
+    return self.transpose()
+
+  def __repr__(self) -> str:
+    return "CSRMatrix(shape=%s, nnz=%d)" % (self.shape, self.nnz)
+
+def multiply(M: "list[list]", v: list, workers: int = None, chunk_size: int = None, executor=None) -> list:
   '''
   Parameters
   ----------
-  - M: list of lists 
+  - M: list of lists, CSRMatrix, or SharedArray
   - v: list
+  - workers: if given (and above 1), split the rows of M across this 
+    many processes (see _parallel_multiply)
+  - chunk_size: rows per task when workers is given
+  - executor: process pool to run the row chunks on instead of the 
+    shared pool of 'workers' processes
 
   Returns
   -------
@@ -37,24 +224,294 @@ def multiply(M: "list[list]", v: list) -> list:
   Returns the vector Mv
   '''
 
+  if isinstance(M, CSRMatrix):
+    return M.matvec(v).tolist()
+  if isinstance(M, SharedArray) or executor is not None or (workers is not None and workers > 1):
+    return _parallel_multiply(M, v, workers, chunk_size, executor).tolist()
+
+  if isinstance(M, np.ndarray):
+    v = np.asarray(v)
+    if M.ndim != 2 or v.shape != (M.shape[1],):
+      raise ValueError("cannot multiply a matrix of shape %s by a vector of shape %s" % (M.shape, v.shape))
+    return np.matmul(M, v).tolist()
+
   #return a list of the dot product of each row of M and v
   return [dot(M[row],v) for row in range(len(M))]
 
 
+class SharedArray:
+  '''
+  A numpy array stored in a multiprocessing.shared_memory block, so 
+  worker processes can attach to it by name instead of being sent a 
+  copy. Build a matrix in one (SharedArray.empty) or copy it in once 
+  (SharedArray.from_array), and pass it to multiply(..., workers=N) 
+  as often as needed; multiply never copies it again. Another process 
+  can open it with SharedArray.attach(name, shape, dtype). Call 
+  close() in each process when done and unlink() once to free it; 
+  unlink() also stops the pools multiply kept the block mapped in.
+  '''
+  __slots__ = ('block', 'array')
+
+  def __init__(self, block, shape, dtype=np.float64):
+    self.block = block
+    self.array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+  @classmethod
+  def empty(cls, shape, dtype=np.float64):
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return cls(shared_memory.SharedMemory(create=True, size=max(1, nbytes)), shape, dtype)
+
+  @classmethod
+  def from_array(cls, a):
+    a = np.asarray(a)
+    shared = cls.empty(a.shape, a.dtype)
+    shared.array[...] = a
+    return shared
+
+  @classmethod
+  def attach(cls, name, shape, dtype=np.float64):
+    return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+  @property
+  def name(self):
+    return self.block.name
+
+  @property
+  def shape(self):
+    return self.array.shape
+
+  @property
+  def dtype(self):
+    return self.array.dtype
+
+  def close(self):
+    #drop the array first: the block cannot close while a view of its buffer exists
+    self.array = None
+    self.block.close()
+
+  def unlink(self):
+    self.block.unlink()
+    _release_pools(self.name)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+    self.unlink()
+
+#one process pool per worker count, kept alive across calls to multiply, 
+#and the names of the caller's SharedArrays its workers may keep mapped
+_process_pools = {}
+_pool_matrices = {}
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+  pool = _process_pools.get(workers)
+  if pool is None:
+    #forked workers would inherit a mapping of every block the parent has open, so start them clean
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    pool = _process_pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+    _pool_matrices[workers] = set()
+  return pool
+
+def _release_pools(name: str) -> None:
+  #shut down the pools whose workers may still map the block, so unlinking it frees the memory
+  for workers in [workers for workers, names in _pool_matrices.items() if name in names]:
+    del _pool_matrices[workers]
+    _process_pools.pop(workers).shutdown()
+
+#in each worker, the caller's matrix attached by the last task; mapping a 
+#large block again on every call costs more than the product, so it is 
+#kept until a task names a different block or the pool is shut down
+_attached_matrix = None
+
+def _worker_matrix(name: str, shape: tuple, dtype: str) -> np.ndarray:
+  global _attached_matrix
+  M = _attached_matrix
+  if M is None or M.name != name or M.shape != shape or M.dtype != dtype:
+    if M is not None:
+      M.close()
+    M = _attached_matrix = SharedArray.attach(name, shape, dtype)
+  return M.array
+
+def _multiply_rows(M_name: str, shape: tuple, dtype: str, v: np.ndarray, out_name: str, start: int, stop: int,
+                   keep: bool = False) -> None:
+  #worker side of _parallel_multiply: attach to M and out by name and fill out[start:stop];
+  #M stays mapped for later tasks only when keep is set
+  if keep:
+    M, blocks = _worker_matrix(M_name, tuple(shape), np.dtype(dtype)), []
+  else:
+    blocks = [SharedArray.attach(M_name, shape, dtype)]
+    M = blocks[0].array
+  blocks.append(SharedArray.attach(out_name, (shape[0],)))
+  try:
+    np.matmul(M[start:stop], v, out=blocks[-1].array[start:stop])
+  finally:
+    del M
+    for block in blocks:
+      block.close()
+
+def _parallel_multiply(M: "list[list]", v: list, workers: int = None, chunk_size: int = None, executor=None) -> np.ndarray:
+  '''
+  Computes Mv with the rows of M split into chunks across a pool of 
+  processes. Workers attach to M and to the result by shared memory 
+  block name, so each task sends only the names, v and its row range. 
+  A SharedArray M is used in place; any other M is copied into a 
+  temporary block first, which for one product costs more than the 
+  product itself. Uses a process pool of 'workers' processes that is 
+  kept for later calls unless an executor is given; only the kept 
+  pool's workers keep a SharedArray mapped between calls, until it 
+  is unlinked. The kept pools start their workers with forkserver (or 
+  spawn), so a script calling this needs an if __name__ == '__main__' 
+  guard. The default chunk_size gives each worker about four chunks.
+  '''
+  owned = None
+  if not isinstance(M, SharedArray):
+    M = owned = SharedArray.from_array(np.asarray(M, dtype=np.float64))
+  try:
+    v = np.asarray(v, dtype=np.result_type(M.dtype, np.float64))
+    if len(M.shape) != 2 or v.shape != (M.shape[1],):
+      raise ValueError("cannot multiply a matrix of shape %s by a vector of shape %s" % (M.shape, v.shape))
+    rows = M.shape[0]
+    keep = False
+    if executor is None:
+      workers = workers or os.cpu_count() or 1
+      executor = _process_pool(workers)
+      keep = owned is None
+      if keep:
+        _pool_matrices[workers].add(M.name)
+    if chunk_size is None:
+      chunk_size = max(1, -(-rows // (4*(workers or os.cpu_count() or 1))))
+
+    with SharedArray.empty((rows,)) as out:
+      futures = [executor.submit(_multiply_rows, M.name, M.shape, M.dtype.str, v, out.name, start, min(start + chunk_size, rows), keep)
+                 for start in range(0, rows, chunk_size)]
+      for future in futures:
+        future.result()
+      return out.array.copy()
+  finally:
+    if owned is not None:
+      owned.close()
+      owned.unlink()
+
 def transpose(M: "list[list]") -> "list[list]":
   '''
   Parameters
   ----------
-  - M: list of lists
+  - M: list of lists, or CSRMatrix
+
+  Returns
+  -------
+  list of lists corresponding to the transpose of M 
+  (a CSRMatrix if M is one)
+
+  '''
+
+  if isinstance(M, CSRMatrix):
+    return M.transpose()
+
+  #materialize the lazy view: its rows are the columns of M
+  return transpose_view(M).tolist()
+
+def transpose_view(M: "list[list]") -> "TransposeView":
+  '''
+  Parameters
+  ----------
+  - M: list of lists, or 2-D numpy array
 
   Returns
   -------
-  list of lists corresponding to the transpose of M
+  the transpose of M without copying it: a TransposeView for a list of 
+  lists, or M.T (a strided view) for a numpy array
+  '''
 
+  if isinstance(M, np.ndarray):
+    return M.T
+  return TransposeView(M)
+
+class TransposeView:
+  '''
+  Read-only transpose of a list-of-lists matrix that never copies it. 
+  Indices are swapped on every read: view[i][j] and view[i, j] are 
+  M[j][i]. Comparing with == walks the entries lazily and stops at the 
+  first difference; tolist() materializes the transpose. Changes to M 
+  show through the view.
   '''
+  __slots__ = ('_M',)
+
+  def __init__(self, M: "list[list]"):
+    self._M = M
+
+  @property
+  def shape(self) -> tuple:
+    return (len(self._M[0]) if self._M else 0, len(self._M))
+
+  @property
+  def T(self) -> "list[list]":
+    return self._M
+
+  def __len__(self) -> int:
+    return self.shape[0]
+
+  def __getitem__(self, index):
+    if isinstance(index, tuple):
+      row, col = index
+      return self._M[col][row]
+    if not -len(self) <= index < len(self):
+      raise IndexError("transpose row index out of range")
+    return _TransposeRow(self._M, index % len(self))
+
+  def __iter__(self):
+    for row in range(len(self)):
+      yield _TransposeRow(self._M, row)
+
+  def __eq__(self, other) -> bool:
+    try:
+      if len(other) != len(self):
+        return False
+    except TypeError:
+      return NotImplemented
+    return all(mine == theirs for mine, theirs in zip(self, other))
+
+  def tolist(self) -> "list[list]":
+    return [row.tolist() for row in self]
+
+  def __repr__(self) -> str:
+    return "TransposeView(%r)" % (self.tolist(),)
+
+class _TransposeRow:
+  #row 'col' of the transpose, i.e. column 'col' of M
+  __slots__ = ('_M', '_col')
+
+  def __init__(self, M: "list[list]", col: int):
+    self._M = M
+    self._col = col
+
+  def __len__(self) -> int:
+    return len(self._M)
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [row[self._col] for row in self._M[index]]
+    return self._M[index][self._col]
+
+  def __iter__(self):
+    for row in self._M:
+      yield row[self._col]
+
+  def __eq__(self, other) -> bool:
+    try:
+      if len(other) != len(self):
+        return False
+    except TypeError:
+      return NotImplemented
+    return all(mine == theirs for mine, theirs in zip(self, other))
+
+  def tolist(self) -> list:
+    return list(self)
 
-  #simply return the list of lists with the rows and columns swapped by first going through the columns and then the rows and placing elements accordingly
-  return  [ [M[row][col] for row in range(len(M))] for col in range(len(M[0]))]
+  def __repr__(self) -> str:
+    return repr(self.tolist())
 
 def complex_multiply(z1: tuple, z2: tuple) -> tuple:
   '''
@@ -77,44 +534,198 @@ def complex_multiply(z1: tuple, z2: tuple) -> tuple:
   m2 = [[z2[0],-1*z2[1]],
         [z2[1],z2[0]]]
   #multiply the matricies
-  result = [[dot(m1[row], [m2[i][col] for i in range(len(m2))]) for col in range(len(m2[row]))] for row in range(len(m1))]
+  result = matmul(m1, m2)
   return (result[0][0],result[1][0])
   
 
 
+def _as_complex(Z) -> "tuple[np.ndarray, bool]":
+  #returns Z as complex128 values and whether it was given as (real, imaginary) pairs
+  Z = np.asarray(Z)
+  if np.iscomplexobj(Z):
+    return Z.astype(np.complex128, copy=False), False
+  if Z.ndim == 0 or Z.shape[-1] != 2:
+    raise ValueError("real input must have shape (..., 2), got %s" % (Z.shape,))
+  #a contiguous float64 (N,2) array has the memory layout of N complex128 values, so this is a view
+  Z = np.ascontiguousarray(Z, dtype=np.float64)
+  return Z.view(np.complex128)[..., 0], True
+
+def batch_complex_multiply(Z1: np.ndarray, Z2: np.ndarray) -> np.ndarray:
+  '''
+  Parameters
+  ----------
+  - Z1: N complex numbers, as an (N,2) array of real and imaginary 
+    parts or a complex array
+  - Z2: N complex numbers in either form (or one, to scale all of Z1)
+
+  Returns
+  -------
+  The N products Z1*Z2 in one vectorized step, as an (N,2) real 
+  array if Z1 was given as one, otherwise as a complex128 array.
+  '''
+
+  z1, pairs = _as_complex(Z1)
+  z2, _ = _as_complex(Z2)
+  product = z1 * z2
+  return product[..., None].view(np.float64) if pairs else product
+
+def complex_product(Z: np.ndarray):
+  '''
+  Parameters
+  ----------
+  - Z: N complex numbers, as an (N,2) array of real and imaginary 
+    parts or a complex array
+
+  Returns
+  -------
+  The product of all of Z: a (real, imaginary) tuple like 
+  complex_multiply if Z was given as pairs, otherwise a complex.
+  '''
+
+  z, pairs = _as_complex(Z)
+  product = complex(np.prod(z))
+  return (product.real, product.imag) if pairs else product
+
 def rotate_matrix(M:"list[list]") -> list:
   '''
   Parameters
   ----------
-  - M: square matrix given as list of lists
+  - M: square matrix given as list of lists, or a numpy array
 
   Returns
   -------
-  M, but rotated 90 degrees counter-clockwise.
+  M, but rotated 90 degrees counter-clockwise. For a numpy array 
+  this is a view of M (nothing is copied).
   '''
 
+  if isinstance(M, np.ndarray):
+    return np.rot90(M)
+
   # rotate 90 degrees counter-clockwise by transposing and reversing the columns
-  transp = transpose(M)
-  # reverses rows by using range method in reverse order: range(start,stop,step)
-  return [ [transp[row][col] for col in range(len(transp[row]))] for row in range(len(transp)-1,-1,-1)]
+  transp = transpose_view(M)
+  # reverses rows by using range method in reverse order: range(start,stop,step); only this copy is made
+  return [transp[row].tolist() for row in range(len(transp)-1,-1,-1)]
 
-def is_positive_semidefinite(M: "list[list]") -> bool:
+def rotate_matrix_inplace(M: "list[list]") -> "list[list]":
   '''
   Parameters
   ----------
-  - M: an arbitrary matrix
+  - M: square matrix given as list of lists, or a square numpy array
 
   Returns
   -------
-  True if M is positive semi-definite, False otherwise
+  M itself, rotated 90 degrees counter-clockwise in place.
 
+  The rotation is a transpose by swapping across the diagonal followed 
+  by reversing the order of the rows. For lists this needs O(1) extra 
+  memory. For arrays each swap moves one row slice at a time, so it 
+  needs O(n) extra memory.
   '''
-  
-  #check if the matrix is equal to its transpose and if it's eigenvalues are all non-negative
-  if(M == transpose(M)):
-    eigenvalues, eigenvectors = np.linalg.eig(M)
-    for eigenvalue in eigenvalues:
-      if eigenvalue < 0:
-        return False
-    return True
-  return False
+
+  n = len(M)
+  if any(len(row) != n for row in M):
+    raise ValueError("rotate_matrix_inplace needs a square matrix")
+
+  if isinstance(M, np.ndarray):
+    for i in range(n):
+      upper = M[i, i+1:].copy()
+      M[i, i+1:] = M[i+1:, i]
+      M[i+1:, i] = upper
+    for i in range(n // 2):
+      top = M[i].copy()
+      M[i] = M[n-1-i]
+      M[n-1-i] = top
+    return M
+
+  for i in range(n):
+    for j in range(i+1, n):
+      M[i][j], M[j][i] = M[j][i], M[i][j]
+  #reversing the outer list only moves row references
+  M.reverse()
+  return M
+
+def rotate_stack(stack: np.ndarray, k: int = 1) -> np.ndarray:
+  '''
+  Parameters
+  ----------
+  - stack: array of shape (..., n, m), e.g. a stack of image tiles
+  - k: number of 90 degree counter-clockwise turns (negative turns 
+    clockwise)
+
+  Returns
+  -------
+  Every matrix in the stack rotated by k*90 degrees in one call. The 
+  result is a view of stack (nothing is copied).
+  '''
+
+  stack = np.asarray(stack)
+  if stack.ndim < 2:
+    raise ValueError("rotate_stack needs at least 2 dimensions, got %d" % stack.ndim)
+  return np.rot90(stack, k, axes=(-2, -1))
+
+def is_positive_semidefinite(M: "list[list]", tol: float = 1e-10) -> bool:
+  '''
+  Parameters
+  ----------
+  - M: an arbitrary matrix, or a stack of matrices of shape (B, n, n)
+  - tol: relative tolerance, scaled by the largest entry of M, for 
+    both the symmetry check and how negative an eigenvalue may be
+
+  Returns
+  -------
+  True if M is positive semi-definite, False otherwise 
+  (a boolean array with one answer per matrix for a stack)
+
+  '''
+
+  A = np.asarray(M, dtype=np.float64)
+  if A.ndim < 2 or A.shape[-1] != A.shape[-2]:
+    return np.zeros(A.shape[:-2], dtype=bool) if A.ndim > 2 else False
+  result = _is_positive_semidefinite(A.reshape((-1,) + A.shape[-2:]), tol)
+  return bool(result[0]) if A.ndim == 2 else result.reshape(A.shape[:-2])
+
+#stacks are checked this many matrices (or bytes of matrices) at a time, which bounds 
+#both the temporaries and the retries one failing matrix causes
+_PSD_CHUNK_MATRICES = 1024
+_PSD_CHUNK_BYTES = 32 * 2**20
+
+def _is_positive_semidefinite(A: np.ndarray, tol: float) -> np.ndarray:
+  #A is a (B, n, n) stack
+  chunk = max(1, min(_PSD_CHUNK_MATRICES, _PSD_CHUNK_BYTES // max(1, A[0].nbytes if len(A) else 1)))
+  result = np.empty(len(A), dtype=bool)
+  for start in range(0, len(A), chunk):
+    result[start:start+chunk] = _is_positive_semidefinite_chunk(A[start:start+chunk], tol)
+  return result
+
+def _is_positive_semidefinite_chunk(A: np.ndarray, tol: float) -> np.ndarray:
+  #every matrix is judged against the same threshold, tol times its largest entry
+  threshold = tol*np.max(np.abs(A), axis=(1, 2), initial=0.0)
+  result = np.zeros(len(A), dtype=bool)
+
+  #check if each matrix is equal to its transpose, up to the threshold
+  symmetric = np.all(np.abs(A - A.transpose(0, 2, 1)) <= threshold[:, None, None], axis=(1, 2))
+  candidates = np.flatnonzero(symmetric)
+  if len(candidates) == 0:
+    return result
+
+  #fast path: a Cholesky factorization of A + threshold*I exists exactly when every eigenvalue is above -threshold
+  shifted = A[candidates] + threshold[candidates, None, None]*np.eye(A.shape[1])
+  try:
+    np.linalg.cholesky(shifted)
+    result[candidates] = True
+    return result
+  except np.linalg.LinAlgError:
+    pass
+
+  #numpy does not say which matrix of the chunk failed, so retry them one at a time (LAPACK stops at the first negative pivot)
+  failed = []
+  for candidate, matrix in zip(candidates, shifted):
+    try:
+      np.linalg.cholesky(matrix)
+      result[candidate] = True
+    except np.linalg.LinAlgError:
+      failed.append(candidate)
+  #the matrices are symmetric, so eigvalsh gives their (ascending, real) eigenvalues; same threshold as above
+  smallest = np.linalg.eigvalsh(A[failed])[:, 0]
+  result[failed] = smallest >= -threshold[failed]
+  return result
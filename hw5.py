@@ -1,25 +1,66 @@
+import hashlib
+from collections import OrderedDict, namedtuple
+
 import numpy as np
 
-def is_stochastic(M: np.ndarray) -> bool:
+from hw4 import CSRMatrix
+
+def is_stochastic(M: np.ndarray, tol: float = 1e-9, block_rows: int = None) -> bool:
   '''
   Parameters
   ----------
-  - M: list of lists (numpy arrays)
+  - M: list of lists (numpy arrays), np.memmap or CSRMatrix, or a 
+    stack of matrices of shape (B, n, n)
+  - tol: how far a column sum may be from 1
+  - block_rows: if given, read M this many rows at a time while 
+    summing the columns. A np.memmap is always read in blocks (of about 
+    16MB by default), so it never has to fit in memory.
 
   Returns
   -------
-  bool
+  bool (a boolean array with one answer per matrix for a stack)
 
   Returns True if M is a left stochastic matrix, False otherwise
   '''
+  if isinstance(M, CSRMatrix):
+    #only stored entries can be negative or add to a column sum
+    sums = np.bincount(M.indices, weights=M.data, minlength=M.shape[1])
+    return M.shape[0] == M.shape[1] and bool(np.all(M.data >= 0)) and bool(np.all(np.abs(sums - 1) <= tol))
+
+  if not isinstance(M, np.ndarray):
+    M = np.asarray(M)
+  if M.ndim == 3:
+    if M.shape[1] != M.shape[2]:
+      return np.zeros(len(M), dtype=bool)
+    #check every matrix of the stack in one pass
+    return np.all(M >= 0, axis=(1, 2)) & np.all(np.abs(np.sum(M, axis=1) - 1) <= tol, axis=1)
+
   #check if: M is square, entries are non-negative, and the sum of each column is 1
-  return (M.shape[0] == M.shape[1]) and (np.all(M >= 0)) and (np.all(np.sum(M, axis=0) == 1))
+  if M.ndim != 2 or M.shape[0] != M.shape[1]:
+    return False
+  if block_rows is None and isinstance(M, np.memmap):
+    block_rows = max(1, 2**24 // max(1, M.shape[1]*M.itemsize))
+  if block_rows is None:
+    return bool(np.all(M >= 0)) and bool(np.all(np.abs(np.sum(M, axis=0) - 1) <= tol))
+
+  sums = np.zeros(M.shape[1])
+  for start in range(0, M.shape[0], block_rows):
+    block = np.asarray(M[start:start+block_rows])
+    if np.any(block < 0):
+      return False
+    sums += np.sum(block, axis=0)
+  return bool(np.all(np.abs(sums - 1) <= tol))
 
-def stationary_states(M: np.ndarray) -> "list[np.array]":
+def stationary_states(M: np.ndarray, method: str = 'eig', tol: float = 1e-12, max_iter: int = 100000) -> "list[np.array]":
     '''
     Parameters
     ----------
-    - M: list of lists (numpy arrays)
+    - M: list of lists (numpy arrays); for method 'power' or 'solve' 
+      also a CSRMatrix or scipy.sparse matrix
+    - method: 'eig' finds every stationary state from a dense 
+      eigendecomposition; 'power' and 'solve' find one stationary state 
+      with stationary_distribution and scale to large sparse chains
+    - tol, max_iter: passed on to stationary_distribution
     
     Returns
     -------
@@ -27,6 +68,9 @@ def stationary_states(M: np.ndarray) -> "list[np.array]":
     
     Returns a list of the stationary states of M
     '''
+    if method != 'eig':
+        return [stationary_distribution(M, method, tol, max_iter).distribution]
+
     #find the eigenvalues and eigenvectors (these are the stationary states) of M
     eigenvalues, eigenvectors = np.linalg.eig(M)
     #get the eigenvectors corresponding to the eigenvalues of 1
@@ -35,41 +79,472 @@ def stationary_states(M: np.ndarray) -> "list[np.array]":
     stationary_states = [stationary_state / np.sum(stationary_state) for stationary_state in normed_stationary_states]
     return stationary_states
 
-def probability_of_return(n: int) -> float:
+StationaryResult = namedtuple('StationaryResult', ['distribution', 'iterations', 'residual', 'converged'])
+
+def stationary_distribution(M, method: str = 'power', tol: float = 1e-12, max_iter: int = 100000, x0: np.ndarray = None) -> StationaryResult:
+    '''
+    Parameters
+    ----------
+    - M: left stochastic matrix as a numpy array, list of lists, 
+      CSRMatrix or scipy.sparse matrix
+    - method: 'power' or 'solve'
+    - tol: power iteration stops once an iteration changes the 
+      distribution by less than tol (in the 1-norm)
+    - max_iter: largest number of power iterations
+    - x0: starting distribution for power iteration (default uniform)
+    
+    Returns
+    -------
+    StationaryResult(distribution, iterations, residual, converged), 
+    where residual is the 1-norm of M x - x
+    
+    Finds a stationary distribution x = M x without a dense 
+    eigendecomposition:
+    - 'power' repeats x <- (x + M x)/2, one mat-vec per iteration, so 
+      it works on any matrix that supports M @ x. The averaged chain 
+      (M + I)/2 has the same stationary states as M but is never 
+      periodic, so the iteration also converges for periodic chains.
+    - 'solve' solves (M - I) x = 0 with the last equation replaced by 
+      sum(x) = 1. Sparse matrices use scipy.sparse.linalg.spsolve, 
+      which needs scipy. The chain must have a unique stationary state.
+    '''
+    if isinstance(M, (list, tuple)):
+        M = np.asarray(M, dtype=np.float64)
+    n = M.shape[0]
+
+    if method == 'power':
+        if max_iter < 1:
+            raise ValueError("max_iter must be at least 1")
+        x = np.full(n, 1/n) if x0 is None else np.asarray(x0, dtype=np.float64) / np.sum(x0)
+        for iteration in range(1, max_iter + 1):
+            x_next = 0.5*(x + M @ x)
+            change = np.sum(np.abs(x_next - x))
+            x = x_next
+            if change < tol:
+                break
+        x = x / np.sum(x)
+        residual = float(np.sum(np.abs(M @ x - x)))
+        return StationaryResult(x, iteration, residual, bool(change < tol))
+
+    if method == 'solve':
+        if isinstance(M, np.ndarray):
+            A = M - np.eye(n)
+            #the rows of M - I are dependent, so one of them can carry the normalization instead
+            A[-1] = 1
+            b = np.zeros(n)
+            b[-1] = 1
+            x = np.linalg.solve(A, b)
+        else:
+            x = _sparse_solve(M, n)
+        residual = float(np.sum(np.abs(M @ x - x)))
+        return StationaryResult(x, 0, residual, True)
+
+    raise ValueError("method must be 'power' or 'solve', got %r" % (method,))
+
+def _sparse_solve(M, n: int) -> np.ndarray:
+    #sparse version of the 'solve' method of stationary_distribution
+    try:
+        import scipy.sparse as sparse
+        from scipy.sparse.linalg import spsolve
+    except ImportError:
+        raise ImportError("method='solve' on a sparse matrix needs scipy; use method='power' instead")
+    if isinstance(M, CSRMatrix):
+        M = sparse.csr_matrix((M.data, M.indices, M.indptr), shape=M.shape)
+    A = sparse.csr_matrix(M, dtype=np.float64) - sparse.identity(n, format='csr')
+    A = sparse.vstack([A[:-1], sparse.csr_matrix(np.ones((1, n)))], format='csc')
+    b = np.zeros(n)
+    b[-1] = 1
+    return spsolve(A, b)
+
+def probability_of_return(n, M: np.ndarray = None, start: int = 0, decomposition: tuple = None):
     '''
     Parameters
     ----------
-    - n: int
+    - n: int, or an array of step counts
+    - M: transition matrix (default: the regular tetrahedron)
+    - start: vertex the walk starts from
+    - decomposition: eigendecomposition(M), to skip looking M up in 
+      the cache (which reads all of M) on repeated queries
     
     Returns
     -------
-    - float
+    - float, or an array of the same shape as n
     
-    Returns the probability of returning to initial position after n random steps along a regular tetrahedron
+    Returns the probability of returning to initial position after n random steps along a regular tetrahedron 
+    (or along the chain M), for every requested n at once
+    '''
+    steps = np.asarray(n)
+    if np.any(steps < 0):
+        raise ValueError("step counts must be non-negative")
+
+    if decomposition is None and M is not None:
+        M = np.ascontiguousarray(M, dtype=np.float64)
+        decomposition = _cached_eigendecomposition(M)
+
+    if decomposition is None and M is None:
+        #the tetrahedron matrix 1/3*(ones - I) has eigenvalue 1 once and -1/3 three times, which gives the closed form
+        #as n goes to infinity this goes to the stationary probability 1/4, alternating above and below it
+        result = 0.25 + 0.75*(-1/3)**steps.astype(np.float64)
+    elif decomposition is None:
+        #M is not (numerically) diagonalizable, so fall back to one matrix power per distinct n
+        unique, inverse = np.unique(steps, return_inverse=True)
+        powers = np.array([np.linalg.matrix_power(M, int(k))[start, start] for k in unique])
+        result = powers[inverse].reshape(steps.shape)
+    else:
+        eigenvalues, V, V_inv = decomposition
+        #(M^n)[s,s] = sum_k V[s,k] * eigenvalue_k^n * V_inv[k,s]
+        weights = V[start, :] * V_inv[:, start]
+        result = np.real(eigenvalues ** steps[..., None] @ weights)
+
+    return float(result) if steps.ndim == 0 else result
+
+def eigendecomposition(M: np.ndarray) -> tuple:
+    '''
+    Returns (eigenvalues, V, V_inv) with M = V diag(eigenvalues) V_inv, 
+    or None if M is not (numerically) diagonalizable.
     '''
-    #create the transition matrix M for the regular tetrahedron with 4 vertices
-    #the probability of moving from one vertex to another is 1/4 as we assume equal probability of moving to each vertex including staying on the same vertex
-    M = 1/3*(np.ones((4,4)) - np.eye(4))
+    eigenvalues, V = np.linalg.eig(np.asarray(M, dtype=np.float64))
+    if np.linalg.cond(V) > 1e10:
+        return None
+    return eigenvalues, V, np.linalg.inv(V)
 
-    #current state:
-    state = np.array([1, 0, 0, 0])
+def _decomposition_bytes(decomposition) -> int:
+    return 0 if decomposition is None else sum(a.nbytes for a in decomposition)
 
-    #return the probability of returning to state 1 after n steps
-    return (np.linalg.matrix_power(M, n) @ state)[0]
+#eigendecompositions for probability_of_return, least recently used first, keyed by 
+#M's shape and a digest of its bytes so that the matrix itself is not kept
+_eigen_cache = OrderedDict()
+_eigen_cache_bytes = 0
+EIGEN_CACHE_MAX_BYTES = 256 * 2**20
 
-    #as n goes to infinity the probability of returning to the initial state does not seem to go the stationary state [0.25,0.25,0.25,0.25] of the transition matrix which would normally be expected but is not guaranteed for all transition matrices
+def _cached_eigendecomposition(M: np.ndarray):
+    global _eigen_cache_bytes
+    key = (M.shape, hashlib.blake2b(M, digest_size=16).digest())
+    if key in _eigen_cache:
+        _eigen_cache.move_to_end(key)
+        return _eigen_cache[key]
+    decomposition = eigendecomposition(M)
+    size = _decomposition_bytes(decomposition)
+    if size <= EIGEN_CACHE_MAX_BYTES:
+        _eigen_cache[key] = decomposition
+        _eigen_cache_bytes += size
+        while _eigen_cache_bytes > EIGEN_CACHE_MAX_BYTES:
+            _eigen_cache_bytes -= _decomposition_bytes(_eigen_cache.popitem(last=False)[1])
+    return decomposition
 
-def matrix_to_dict(M: np.ndarray) -> dict:
+def matrix_to_dict(M: np.ndarray, sparse: bool = False) -> dict:
     '''
     Parameters
     ----------
-    - M: list of lists (numpy arrays)
+    - M: list of lists (numpy arrays), or CSRMatrix
+    - sparse: if True, skip zero probabilities and give each column as 
+      a pair of arrays (targets, weights) instead of a list of tuples
     
     Returns
     -------
     - dict
     
-    Returns a dictionary representation of the matrix M that represents a Markov chain
+    Returns a dictionary representation of the matrix M that represents a Markov chain. 
+    For a CSRMatrix only the stored (nonzero) entries of each column are listed. 
+    dict_to_matrix turns either form back into a matrix.
+    '''
+    if not sparse and not isinstance(M, CSRMatrix):
+        #read whole columns instead of indexing M[i][j] one entry at a time
+        columns = np.asarray(M).T
+        rows = range(columns.shape[1])
+        return {j: list(zip(rows, columns[j].tolist())) for j in range(columns.shape[0])}
+
+    #rows of the transpose are the columns of M
+    columns = M.transpose() if isinstance(M, CSRMatrix) else CSRMatrix.from_dense(np.asarray(M).T)
+    result = {}
+    for j in range(columns.shape[0]):
+        start, end = columns.indptr[j], columns.indptr[j+1]
+        if sparse:
+            #slices of the transpose's arrays, so no per-entry objects are created
+            result[j] = (columns.indices[start:end], columns.data[start:end])
+        else:
+            result[j] = list(zip(columns.indices[start:end].tolist(), columns.data[start:end].tolist()))
+    return result
+
+def dict_to_matrix(d: dict, shape: tuple = None) -> CSRMatrix:
+    '''
+    Parameters
+    ----------
+    - d: dictionary from matrix_to_dict, in either form
+    - shape: shape of the matrix (default: square, just large enough 
+      for every column and target in d)
+    
+    Returns
+    -------
+    - CSRMatrix
+    
+    Rebuilds the matrix described by d as a sparse matrix, without a 
+    dense intermediate. Zero probabilities are dropped.
+    '''
+    targets = []
+    weights = []
+    for j in range(max(d, default=-1) + 1):
+        column = d.get(j, ())
+        if isinstance(column, tuple) and len(column) == 2 and isinstance(column[0], np.ndarray):
+            column_targets, column_weights = column
+        else:
+            column_targets = [i for i, _ in column]
+            column_weights = [p for _, p in column]
+        targets.append(np.asarray(column_targets, dtype=np.int64))
+        weights.append(np.asarray(column_weights, dtype=np.float64))
+
+    lengths = [len(column_targets) for column_targets in targets]
+    indices = np.concatenate(targets) if targets else np.zeros(0, dtype=np.int64)
+    data = np.concatenate(weights) if weights else np.zeros(0)
+    if shape is None:
+        n = max(len(targets), int(indices.max()) + 1 if len(indices) else 0)
+        shape = (n, n)
+    if len(targets) > shape[1] or (len(indices) and indices.max() >= shape[0]):
+        raise ValueError("d does not fit in a matrix of shape %s" % (shape,))
+
+    #build the transpose (one row per column of d) and transpose it back
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    keep = data != 0
+    rows, indices, data = rows[keep], indices[keep], data[keep]
+    indptr = np.zeros(shape[1] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[1]), out=indptr[1:])
+    return CSRMatrix(data, indices, indptr, (shape[1], shape[0])).transpose()
+
+WalkResult = namedtuple('WalkResult', ['occupancy', 'visits', 'first_return', 'returned_fraction', 'mean_return_time'])
+
+def _alias_tables(M) -> tuple:
+    '''
+    Builds Walker/Vose alias tables for every column of M, packed into 
+    flat arrays: the slots of column j are offsets[j]:offsets[j]+sizes[j], 
+    slot s keeps target[s] with probability keep[s] and moves to 
+    alias[s] otherwise.
+    '''
+    columns = matrix_to_dict(M, sparse=True)
+    sizes = np.array([len(columns[j][0]) for j in range(len(columns))], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    target = np.concatenate([columns[j][0] for j in range(len(columns))])
+    keep = np.ones(len(target))
+    alias = target.copy()
+
+    for j in range(len(columns)):
+        weights = columns[j][1]
+        scaled = weights * (len(weights) / np.sum(weights))
+        small = [i for i in range(len(weights)) if scaled[i] < 1]
+        large = [i for i in range(len(weights)) if scaled[i] >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            keep[offsets[j] + s] = scaled[s]
+            alias[offsets[j] + s] = target[offsets[j] + l]
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+        #whatever is left is 1 up to rounding
+        for i in small + large:
+            keep[offsets[j] + i] = 1
+    return offsets, sizes, target, keep, alias
+
+def simulate_walks(M, n_walkers: int, n_steps: int, start=0, rng=None) -> WalkResult:
+    '''
+    Parameters
+    ----------
+    - M: left stochastic matrix accepted by is_stochastic
+    - n_walkers: number of independent walkers
+    - n_steps: number of steps every walker takes
+    - start: starting state of every walker (an int, or one per walker)
+    - rng: np.random.Generator, or a seed for np.random.default_rng
+    
+    Returns
+    -------
+    WalkResult(occupancy, visits, first_return, returned_fraction, mean_return_time):
+    - occupancy: number of walkers in each state after n_steps
+    - visits: number of visits to each state over steps 1..n_steps
+    - first_return: step at which each walker first came back to its 
+      start, or -1 if it never did
+    - returned_fraction, mean_return_time: summary of first_return 
+      over the walkers that returned
+    
+    Advances all walkers together, one vectorized step at a time. Each 
+    step draws the next state from alias tables built once from the 
+    columns of M, so a step costs O(1) per walker regardless of how many 
+    targets a state has. occupancy[start] / n_walkers estimates 
+    probability_of_return(n_steps, M, start).
+    '''
+    if not is_stochastic(M):
+        raise ValueError("M is not a left stochastic matrix")
+    rng = np.random.default_rng(rng)
+    offsets, sizes, target, keep, alias = _alias_tables(M)
+    n = len(sizes)
+
+    origin = np.broadcast_to(np.asarray(start, dtype=np.int64), (n_walkers,))
+    state = origin.copy()
+    visits = np.zeros(n, dtype=np.int64)
+    first_return = np.full(n_walkers, -1, dtype=np.int64)
+
+    for step in range(1, n_steps + 1):
+        #pick a slot of the current column uniformly, then keep its target or take its alias
+        slot = offsets[state] + (rng.random(n_walkers) * sizes[state]).astype(np.int64)
+        state = np.where(rng.random(n_walkers) < keep[slot], target[slot], alias[slot])
+        visits += np.bincount(state, minlength=n)
+        first_return[(state == origin) & (first_return < 0)] = step
+
+    returned = first_return > 0
+    mean_return_time = float(np.mean(first_return[returned])) if returned.any() else float('nan')
+    return WalkResult(np.bincount(state, minlength=n), visits, first_return, float(np.mean(returned)), mean_return_time)
+
+class MarkovChain:
     '''
-    #convert the matrix to a dictionary using a dictionary comprehension
-    return {j: [(i,M[i][j]) for i in range(len(M))] for j in range(len(M[0]))}
\ No newline at end of file
+    A Markov chain given by a dense left stochastic matrix M, for 
+    answering many n-step questions about the same chain.
+
+    The squares M^2, M^4, M^8, ... (M^(2^k)) are computed by repeated 
+    squaring the first time they are needed and kept in an LRU cache 
+    that holds at most max_cache_bytes of matrices. The n-step 
+    distribution M^n x applies one cached square per set bit of n, so 
+    after warm-up a query costs about log2(n) mat-vecs. The 
+    eigendecomposition used for return probabilities over many n is 
+    cached the same way and counts against the same budget. Changing 
+    the matrix through set_matrix or update clears the cache:
+
+    chain = MarkovChain(M)
+    chain.distribution(1000, [1, 0, 0])
+    chain.update(0, 1, 0.3)
+    '''
+
+    def __init__(self, M: np.ndarray, max_cache_bytes: int = 256*2**20):
+        self.max_cache_bytes = max_cache_bytes
+        self.set_matrix(M)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        #read-only, so that every change goes through set_matrix or update
+        view = self._M.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def n_states(self) -> int:
+        return self._M.shape[0]
+
+    def set_matrix(self, M: np.ndarray) -> None:
+        '''
+        Replaces the transition matrix (a copy of M is kept) and clears 
+        the cached powers.
+        '''
+        M = np.array(M, dtype=np.float64)
+        if M.ndim != 2 or M.shape[0] != M.shape[1]:
+            raise ValueError("transition matrix must be square, got shape %s" % (M.shape,))
+        self._M = M
+        self.invalidate()
+
+    def update(self, i: int, j: int, p: float) -> None:
+        '''
+        Sets the transition probability M[i, j] = p and clears the cached 
+        powers. Keeping the columns stochastic is up to the caller.
+        '''
+        self._M[i, j] = p
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        self._squares = OrderedDict()
+        self._decomposition = None
+        self._cache_bytes = 0
+
+    def cache_info(self) -> dict:
+        '''
+        Returns which squares M^(2^k) are cached (by k, least recently 
+        used first) and how many bytes they take.
+        '''
+        return {'squares': list(self._squares), 'decomposition': self._decomposition is not None,
+                'bytes': self._cache_bytes, 'max_bytes': self.max_cache_bytes}
+
+    def eigendecomposition(self) -> tuple:
+        '''
+        Returns eigendecomposition(M), computing it only once per matrix.
+        '''
+        if self._decomposition is not None:
+            return self._decomposition[0]
+        decomposition = eigendecomposition(self._M)
+        size = _decomposition_bytes(decomposition)
+        if size <= self.max_cache_bytes:
+            self._decomposition = (decomposition,)
+            self._cache_bytes += size
+            self._evict()
+        return decomposition
+
+    def _square(self, k: int) -> np.ndarray:
+        #returns M^(2^k), squaring up from the largest cached lower power
+        if k == 0:
+            return self._M
+        if k in self._squares:
+            self._squares.move_to_end(k)
+            return self._squares[k]
+        j = max((cached for cached in self._squares if cached < k), default=0)
+        power = self._square(j)
+        for m in range(j + 1, k + 1):
+            power = power @ power
+            self._store(m, power)
+        return power
+
+    def _store(self, k: int, power: np.ndarray) -> None:
+        if power.nbytes > self.max_cache_bytes:
+            return
+        self._squares[k] = power
+        self._cache_bytes += power.nbytes
+        self._evict()
+
+    def _evict(self) -> None:
+        #drop the least recently used squares, then the decomposition, until the cache fits
+        while self._cache_bytes > self.max_cache_bytes and self._squares:
+            _, evicted = self._squares.popitem(last=False)
+            self._cache_bytes -= evicted.nbytes
+        if self._cache_bytes > self.max_cache_bytes:
+            self._cache_bytes -= _decomposition_bytes(self._decomposition[0])
+            self._decomposition = None
+
+    def power(self, n: int) -> np.ndarray:
+        '''
+        Returns M^n, as a product of cached squares.
+        '''
+        n = int(n)
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        result = np.eye(self.n_states)
+        for k in range(n.bit_length()):
+            if n >> k & 1:
+                result = self._square(k) @ result
+        return result
+
+    def distribution(self, n: int, x0) -> np.ndarray:
+        '''
+        Returns the distribution M^n x0 after n steps from x0 (a 
+        distribution, or a 2-D array with one distribution per column).
+        '''
+        n = int(n)
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        x = np.asarray(x0, dtype=np.float64)
+        #powers of M commute, so the squares can be applied in any order
+        for k in range(n.bit_length()):
+            if n >> k & 1:
+                x = self._square(k) @ x
+        return x
+
+    def probability_of_return(self, n: int, start: int = 0) -> float:
+        '''
+        Returns the probability of being back at start after n steps. 
+        For an array of step counts this uses the cached 
+        eigendecomposition instead of the squares.
+        '''
+        if np.ndim(n) > 0:
+            decomposition = self.eigendecomposition()
+            if decomposition is not None:
+                return probability_of_return(n, self._M, start, decomposition)
+            return np.vectorize(lambda k: self.probability_of_return(int(k), start), otypes=[float])(n)
+        x0 = np.zeros(self.n_states)
+        x0[start] = 1
+        return float(self.distribution(n, x0)[start])
+
+    def is_stochastic(self, tol: float = 1e-9) -> bool:
+        return is_stochastic(self._M, tol)
+
+    def stationary(self, method: str = 'power', **kwargs) -> StationaryResult:
+        return stationary_distribution(self._M, method, **kwargs)
@@ -1,6 +1,148 @@
 # %%
+import os
+import re
+import tempfile
+import threading
+import warnings
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 
+# %%
+#process-wide cache of parsed CSV files, least recently used first: (absolute path, mtime_ns, size) -> DataFrame,
+#and (absolute path, mtime_ns, size, 'emissions') -> EmissionsStore
+_csv_cache = OrderedDict()
+_csv_cache_bytes = 0
+_csv_cache_lock = threading.Lock()
+CSV_CACHE_MAX_BYTES = 512 * 2**20
+SIDECAR_FORMATS = ('parquet', 'feather')
+
+def _file_key(file_path: str) -> tuple:
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+def _sidecar_path(key: tuple, sidecar: str) -> str:
+    #the CSV's mtime and size are part of the name, so an edited CSV never matches an old sidecar
+    path, mtime_ns, size = key
+    return '%s.%d-%d.%s' % (path, size, mtime_ns, sidecar)
+
+def _read_sidecar(key: tuple, sidecar: str):
+    """
+    Returns the DataFrame stored in the sidecar for this version of the CSV file, or None.
+    A sidecar that cannot be read (truncated or corrupt) is deleted; one this process has no
+    engine for is left for processes that do.
+    """
+    path = _sidecar_path(key, sidecar)
+    if not os.path.exists(path):
+        return None
+    try:
+        return getattr(pd, 'read_' + sidecar)(path)
+    except ImportError:
+        return None
+    except Exception:
+        #the CSV is still there, so parse it instead and let the next write replace the sidecar
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def _write_sidecar(data: pd.DataFrame, key: tuple, sidecar: str) -> None:
+    path = _sidecar_path(key, sidecar)
+    directory, name = os.path.split(key[0])
+    #sidecars of older versions of the file: <name>.<size>-<mtime_ns>.<format>
+    older = re.compile(re.escape(name) + r'\.\d+-\d+\.' + re.escape(sidecar) + '$')
+    temp = None
+    try:
+        for other in os.listdir(directory):
+            if older.match(other) and other != os.path.basename(path):
+                os.remove(os.path.join(directory, other))
+        #write to a temporary file and rename it, so readers never see a half-written sidecar
+        handle, temp = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+        os.close(handle)
+        getattr(data, 'to_' + sidecar)(temp)
+        os.replace(temp, path)
+        temp = None
+    except (OSError, ImportError, ValueError) as error:
+        #the sidecar only saves time, so failing to write it is not an error
+        warnings.warn('could not write %s sidecar %s: %s' % (sidecar, path, error))
+    finally:
+        if temp is not None and os.path.exists(temp):
+            os.remove(temp)
+
+def read_csv_cached(file_path: str, sidecar: str = None, allow_pickle: bool = False) -> pd.DataFrame:
+    """
+    Reads a CSV file, parsing it at most once per process while the file is unchanged.
+
+    Parsed files are kept in a process-wide LRU cache keyed by path, modification time and size,
+    so an edited file is parsed again. The cache holds at most CSV_CACHE_MAX_BYTES of DataFrames
+    (as measured by DataFrame.memory_usage(deep=True)). Each call returns a shallow copy, which
+    under copy-on-write shares the data until one side is modified, so changing the returned
+    DataFrame never changes what later calls see.
+
+    Args:
+        file_path (str): The path to the CSV file.
+        sidecar (str, optional): 'parquet' or 'feather'. When given, a binary copy is written next
+            to the CSV file, named after the file's size and modification time, and later
+            processes read it instead of parsing the CSV while the file is unchanged. Both need
+            pyarrow; without it the CSV is simply parsed.
+        allow_pickle (bool, optional): Also accept sidecar='pickle'. Loading a pickle runs
+            whatever code the file contains, so only use it for directories nobody else can
+            write to.
+
+    Returns:
+        pd.DataFrame: The contents of the file.
+    """
+    if sidecar == 'pickle' and allow_pickle:
+        warnings.warn('pickle sidecars run code from the file when loaded; only use them for trusted directories')
+    elif sidecar is not None and sidecar not in SIDECAR_FORMATS:
+        raise ValueError('sidecar must be one of %s, got %r' % (SIDECAR_FORMATS, sidecar))
+
+    key = _file_key(file_path)
+    data = _cache_get(key)
+    if data is not None:
+        return data.copy(deep=False)
+
+    data = _read_sidecar(key, sidecar) if sidecar else None
+    if data is None:
+        data = pd.read_csv(file_path)
+        if sidecar:
+            _write_sidecar(data, key, sidecar)
+
+    _cache_put(key, data, int(data.memory_usage(deep=True).sum()))
+    return data.copy(deep=False)
+
+def _cache_get(key: tuple):
+    with _csv_cache_lock:
+        if key in _csv_cache:
+            _csv_cache.move_to_end(key)
+            return _csv_cache[key][0]
+    return None
+
+def _cache_put(key: tuple, value, size: int) -> None:
+    #key is the file key, optionally followed by what was built from the file
+    global _csv_cache_bytes
+    with _csv_cache_lock:
+        #drop older versions of the same file before adding this one
+        for stale in [cached for cached in _csv_cache
+                      if cached[0] == key[0] and cached[3:] == key[3:] and cached != key]:
+            _csv_cache_bytes -= _csv_cache.pop(stale)[1]
+        if size <= CSV_CACHE_MAX_BYTES and key not in _csv_cache:
+            _csv_cache[key] = (value, size)
+            _csv_cache_bytes += size
+            while _csv_cache_bytes > CSV_CACHE_MAX_BYTES:
+                _csv_cache_bytes -= _csv_cache.popitem(last=False)[1][1]
+
+def clear_csv_cache() -> None:
+    """
+    Empties the cache used by read_csv_cached and load_emissions_store.
+    """
+    global _csv_cache_bytes
+    with _csv_cache_lock:
+        _csv_cache.clear()
+        _csv_cache_bytes = 0
+
 # %%
 def get_per_cap_gdp(file_path: str) -> pd.DataFrame:
     """
@@ -14,7 +156,7 @@ def get_per_cap_gdp(file_path: str) -> pd.DataFrame:
     """
 
     # Read the data from the file
-    data = pd.read_csv(file_path)
+    data = read_csv_cached(file_path)
 
     # Create a new DataFrame with the required columns
     df = pd.DataFrame()
@@ -23,6 +165,78 @@ def get_per_cap_gdp(file_path: str) -> pd.DataFrame:
 
     return df
 
+# %%
+class EmissionsStore:
+    """
+    Emissions indexed for fast (countries, years) sums.
+
+    The data is kept as one float array with a row per country and a column per year, plus
+    dictionaries from country name to row and from year to column. A query looks up its rows
+    and columns and sums that block of the array with one fancy-indexed reduction. Missing
+    values are stored as 0, which gives the same sums as pandas, and a country that appears on
+    several rows of the file gets one row holding their total.
+    """
+
+    def __init__(self, countries: 'list[str]', years: 'list[str]', values: np.ndarray):
+        self.countries = list(countries)
+        self.years = list(years)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.country_index = {country: row for row, country in enumerate(self.countries)}
+        self.year_index = {year: col for col, year in enumerate(self.years)}
+
+    @classmethod
+    def from_csv(cls, file_path: str) -> 'EmissionsStore':
+        """
+        Builds the store from a wide emissions file with a 'Country Name' column and one
+        column per year. Only those columns are read.
+
+        Args:
+            file_path (str): The path to the file containing the emissions data.
+
+        Returns:
+            EmissionsStore: The indexed data.
+        """
+        header = pd.read_csv(file_path, nrows=0).columns
+        years = [column for column in header if column.strip().isdigit()]
+        data = pd.read_csv(file_path, usecols=['Country Name'] + years, dtype={year: np.float64 for year in years})
+        totals = data.groupby('Country Name', sort=False)[years].sum()
+        return cls(totals.index, years, totals.to_numpy())
+
+    def sum(self, countries: 'list[str]', years: 'list[str]') -> float:
+        """
+        Calculates the sum of emissions for the given countries and years.
+
+        Args:
+            countries (list): Country names; names not in the data are ignored and each country
+                counts once.
+            years (list): Years, as strings or ints; a year listed twice counts twice.
+
+        Returns:
+            float: The sum of emissions for the specified countries and years.
+        """
+        rows = [self.country_index[country] for country in set(countries) if country in self.country_index]
+        cols = [self.year_index[str(year)] for year in years]
+        return float(self.values[np.ix_(rows, cols)].sum())
+
+def load_emissions_store(file_path: str) -> EmissionsStore:
+    """
+    Returns the EmissionsStore for a file, building it only the first time the file (in its
+    current version) is used. Stores share read_csv_cached's cache and its
+    CSV_CACHE_MAX_BYTES budget.
+
+    Args:
+        file_path (str): The path to the file containing the emissions data.
+
+    Returns:
+        EmissionsStore: The indexed data.
+    """
+    key = _file_key(file_path) + ('emissions',)
+    store = _cache_get(key)
+    if store is None:
+        store = EmissionsStore.from_csv(file_path)
+        _cache_put(key, store, store.values.nbytes)
+    return store
+
 # %%
 def get_emissions_sum(file_path: str, L1: 'list[str]', L2: 'list[str]') -> float:
     """
@@ -37,13 +251,8 @@ def get_emissions_sum(file_path: str, L1: 'list[str]', L2: 'list[str]') -> float
         float: The sum of emissions for the specified countries and years.
     """
 
-    # Read the data from the file
-    data = pd.read_csv(file_path)
-
-    #create a new column with the specifcs year columns summed
-    data['specificSum'] = data[L2].sum(axis=1)
-    #return the sum of the specific countries
-    return data[data['Country Name'].isin(L1)]['specificSum'].sum()
+    # Look the countries and years up in the indexed data for the file
+    return load_emissions_store(file_path).sum(L1, L2)
 
 # %%
 def get_total_volume(file_path:str, year:str) -> float:
@@ -59,7 +268,7 @@ def get_total_volume(file_path:str, year:str) -> float:
     """
     
     # Read the data from the file
-    data = pd.read_csv(file_path)
+    data = read_csv_cached(file_path)
     data = data[['Date','Volume']]
 
     # Convert the 'Date' column to datetime object in format='%Y-%m-%d'
@@ -86,7 +295,7 @@ def get_max_price(file_path: str) -> pd.DataFrame:
     """
     
     # Read the data from the file
-    data = pd.read_csv(file_path)
+    data = read_csv_cached(file_path)
 
     # Drop rows with missing values in 'country' and 'price' columns
     data = data.dropna(subset=['country', 'price'])
@@ -113,7 +322,7 @@ def min_weight(file_path:str) -> pd.DataFrame:
     """
     
     # Read the data from the file
-    data = pd.read_csv(file_path)
+    data = read_csv_cached(file_path)
 
     # Group by year and find the index of the min weight in each group
     idx = data.groupby('year')['weight'].idxmin()
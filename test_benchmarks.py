@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+import benchmarks
+from benchmarks import compare, time_call
+
+class TestCompare(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = {'hw2.dot': {'10': 1.0, '100': 2.0}}
+
+    def test_regression_above_threshold(self):
+        results = {'hw2.dot': {'10': 1.6, '100': 2.0}}
+        regressions = compare(results, self.baseline, 1.5)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('hw2.dot n=10:'))
+
+    def test_no_regression_below_threshold(self):
+        results = {'hw2.dot': {'10': 1.4, '100': 0.5}}
+        self.assertEqual(compare(results, self.baseline, 1.5), [])
+
+    def test_missing_baseline_entries_are_skipped(self):
+        results = {'hw2.dot': {'1000': 100.0}, 'hw2.norm': {'10': 100.0}}
+        self.assertEqual(compare(results, self.baseline, 1.5), [])
+
+class TestTimeCall(unittest.TestCase):
+
+    def test_time_per_call(self):
+        calls = []
+        seconds = time_call(lambda: calls.append(1), min_time=0.01, repeat=2)
+        self.assertGreater(seconds, 0)
+        self.assertLess(seconds, 0.01)
+        self.assertGreater(len(calls), 2)
+
+class TestMain(unittest.TestCase):
+
+    def test_missing_baseline_fails(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'baseline.json')
+            self.assertEqual(benchmarks.main(['--only', 'hw2.dot', '--baseline', path]), 2)
+        finally:
+            os.rmdir(directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import array
 import unittest
-from hw2 import is_in_first_quadrant, dot, norm, largest_norm
+import numpy as np
+from hw2 import is_in_first_quadrant, dot, norm, largest_norm, largest_norms, batch_dot, batch_norm, _as_float_array
 
 class TestIsInFirstQuadrant(unittest.TestCase):
     def test_positive_values(self):
@@ -81,6 +83,69 @@ class TestNorm(unittest.TestCase):
         expected_result = 3.0
         self.assertEqual(norm(vector), expected_result)
 
+class TestBatchDot(unittest.TestCase):
+    def test_rows(self):
+        V1 = np.array([[1, 2, 3], [0, 0, 0], [1, 2, 3]])
+        V2 = np.array([[4, 5, 6], [1, 2, 3], [-4, 5, -6]])
+        expected_result = [32, 0, -12]
+        self.assertEqual(batch_dot(V1, V2).tolist(), expected_result)
+
+    def test_matches_dot(self):
+        V1 = np.random.default_rng(0).normal(size=(50, 7))
+        V2 = np.random.default_rng(1).normal(size=(50, 7))
+        result = batch_dot(V1, V2)
+        for i in range(len(V1)):
+            self.assertAlmostEqual(result[i], dot(list(V1[i]), list(V2[i])))
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            batch_dot(np.ones((2, 3)), np.ones((3, 3)))
+
+class TestBatchNorm(unittest.TestCase):
+    def test_rows(self):
+        V = np.array([[3, 4, 0], [0, 0, 0], [-2, -3, -6]])
+        expected_result = [5.0, 0.0, 7.0]
+        self.assertEqual(batch_norm(V).tolist(), expected_result)
+
+    def test_single_vector(self):
+        self.assertEqual(batch_norm([1, -2, 2]).tolist(), [3.0])
+
+class TestShortListPath(unittest.TestCase):
+    def test_matches_numpy_path(self):
+        rng = np.random.default_rng(0)
+        for n in (1, 3, 256, 257, 1000):
+            v1 = rng.normal(size=n).tolist()
+            v2 = rng.normal(size=n).tolist()
+            self.assertAlmostEqual(dot(v1, v2), float(np.dot(v1, v2)))
+            self.assertAlmostEqual(norm(v1), float(np.linalg.norm(v1)))
+            self.assertIsInstance(dot(v1, v2), float)
+
+    def test_tuples_and_ints(self):
+        self.assertEqual(dot((1, 2, 3), (4, 5, 6)), 32.0)
+        self.assertIsInstance(norm((3, 4)), float)
+
+class TestBufferInputs(unittest.TestCase):
+    def test_float64_buffer_is_not_copied(self):
+        buffer = array.array('d', [3, 4])
+        wrapped = _as_float_array(memoryview(buffer))
+        wrapped[0] = 6
+        self.assertEqual(buffer[0], 6)
+
+    def test_array_and_memoryview(self):
+        v1 = array.array('d', [1, 2, 3])
+        v2 = memoryview(array.array('d', [4, 5, 6]))
+        self.assertEqual(dot(v1, v2), 32)
+        self.assertEqual(norm(memoryview(array.array('d', [3, 4]))), 5.0)
+        self.assertTrue(is_in_first_quadrant(v2))
+
+    def test_integer_buffer(self):
+        self.assertEqual(norm(array.array('i', [-2, -3, -6])), 7.0)
+
+    def test_strided_array(self):
+        V = np.arange(12, dtype=float).reshape(3, 4)
+        self.assertEqual(dot(V[:, 0], V[:, 1]), 0*1 + 4*5 + 8*9)
+        self.assertEqual(batch_norm(V[:, ::2]).tolist(), [2.0, np.sqrt(16+36), np.sqrt(64+100)])
+
 class TestLargestNorm(unittest.TestCase):
     def test_single_vector(self):
         vectors = [[1, 2, 3]]
@@ -97,5 +162,29 @@ class TestLargestNorm(unittest.TestCase):
         expected_result = [7, 8, 9]
         self.assertEqual(largest_norm(vectors), expected_result)
 
+class TestLargestNorms(unittest.TestCase):
+    def test_top_k(self):
+        vectors = [[1, 0], [3, 4], [0, 2], [6, 8], [1, 1]]
+        expected_result = [[6, 8], [3, 4], [0, 2]]
+        self.assertEqual(largest_norms(vectors, 3), expected_result)
+
+    def test_tie_breaker(self):
+        vectors = [[1, 0], [0, 1], [-1, 0], [0, 0]]
+        expected_result = [[1, 0], [0, 1]]
+        self.assertEqual(largest_norms(vectors, 2, chunk_size=1), expected_result)
+
+    def test_generator_of_mixed_lengths(self):
+        vectors = (v for v in [(1,), (1, 1), (2, 2, 2), (0, 0)])
+        expected_result = [(2, 2, 2), (1, 1)]
+        self.assertEqual(largest_norms(vectors, 2, chunk_size=3), expected_result)
+
+    def test_array_chunks(self):
+        vectors = np.arange(30, dtype=float).reshape(10, 3)[::-1]
+        result = largest_norms(vectors, 2, chunk_size=4)
+        self.assertEqual([list(v) for v in result], [[27, 28, 29], [24, 25, 26]])
+
+    def test_k_larger_than_input(self):
+        self.assertEqual(largest_norms([[1], [2]], 5), [[2], [1]])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
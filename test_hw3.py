@@ -1,5 +1,6 @@
 import unittest
-from hw3 import is_scalar_multiple, reverse_dictionary, count_vectors, normalize, orthogonal_projection
+import numpy as np
+from hw3 import is_scalar_multiple, are_scalar_multiples, reverse_dictionary, count_vectors, normalize, batch_normalize, orthogonal_projection, batch_orthogonal_projection, SubspaceProjector, project_onto_subspace, DirectionIndex, VectorCounter, ReverseIndex
 
 class TestIsScalarMultiple(unittest.TestCase):
     def test_hw_1(self):
@@ -37,6 +38,30 @@ class TestIsScalarMultiple(unittest.TestCase):
         v1 = [1, 2, 3]
         v2 = [1, 2]
         self.assertFalse(is_scalar_multiple(v1, v2))
+    def test_zero_in_first_entry(self):
+        self.assertTrue(is_scalar_multiple([0, 1, 2], [0, 2, 4]))
+
+    def test_rounded_multiple(self):
+        v1 = [0.1, 0.2, 0.3]
+        v2 = [0.1*3, 0.2*3, 0.3*3]
+        self.assertTrue(is_scalar_multiple(v1, v2))
+        self.assertFalse(is_scalar_multiple([1, 2], [1, 2.001]))
+
+class TestAreScalarMultiples(unittest.TestCase):
+    def test_batch(self):
+        V1 = np.array([[1, 2, 3], [1, 2, 3], [0, 0, 0], [1, -1, 0], [3, 0, 0]])
+        V2 = np.array([[2, 4, 6], [4, 5, 6], [7, 8, 9], [-2, 2, 0], [0, 0, 1]])
+        self.assertEqual(are_scalar_multiples(V1, V2).tolist(), [True, False, True, True, False])
+
+    def test_tolerance(self):
+        V1 = np.array([[1.0, 2.0]])
+        V2 = np.array([[1.0, 2.0 + 1e-6]])
+        self.assertFalse(are_scalar_multiples(V1, V2)[0])
+        self.assertTrue(are_scalar_multiples(V1, V2, rtol=1e-5)[0])
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            are_scalar_multiples(np.ones((2, 3)), np.ones((2, 2)))
 
 class TestReverseDictionary(unittest.TestCase):
     def test_empty_dictionary(self):
@@ -63,6 +88,33 @@ class TestReverseDictionary(unittest.TestCase):
         d = {1: 'a', 2: 2, 3: 'b', 4: 2}
         expected = {'a': [1], 2: [2, 4], 'b': [3]}
         self.assertEqual(reverse_dictionary(d), expected)
+class TestReverseIndex(unittest.TestCase):
+    def test_matches_reverse_dictionary(self):
+        d = {1: 'a', 2: 2, 3: 'b', 4: 2}
+        self.assertEqual(ReverseIndex(d).to_dict(), reverse_dictionary(d))
+
+    def test_set_and_delete(self):
+        d = {1: 'a', 2: 'b', 3: 'b'}
+        index = ReverseIndex(d)
+        index.set(4, 'a')
+        index.set(2, 'c')
+        index.delete(1)
+        self.assertEqual(d, {2: 'c', 3: 'b', 4: 'a'})
+        self.assertEqual(index.to_dict(), {'a': [4], 'b': [3], 'c': [2]})
+        index.delete(4)
+        self.assertNotIn('a', index)
+        with self.assertRaises(KeyError):
+            index.delete(1)
+
+    def test_build_parallel(self):
+        d = {i: i % 7 for i in range(1000)}
+        index = ReverseIndex.build_parallel(d, shards=3)
+        self.assertEqual(index.to_dict(), reverse_dictionary(d))
+        self.assertIs(index.forward, d)
+
+    def test_build_parallel_small(self):
+        self.assertEqual(ReverseIndex.build_parallel({}, shards=2).to_dict(), {})
+        self.assertEqual(ReverseIndex.build_parallel({1: 'a'}, shards=4)['a'], [1])
 
 class TestCountVectors(unittest.TestCase):
     def test_empty_vectors(self):
@@ -84,6 +136,42 @@ class TestCountVectors(unittest.TestCase):
         vectors = [(1, 2, 3), (1, 2, 3), (2, 3, 4), (1, 2, 3)]
         expected = {(1, 2, 3): 3, (2, 3, 4): 1}
         self.assertEqual(count_vectors(vectors), expected)
+    def test_generator(self):
+        vectors = (v for v in [(1,), (1,), (2,)])
+        self.assertEqual(count_vectors(vectors), {(1,): 2, (2,): 1})
+
+class TestVectorCounter(unittest.TestCase):
+    def test_exact_merge(self):
+        a = VectorCounter().update([(1, 0), (1, 0), (2, 3)])
+        b = VectorCounter().update([(2, 3), (0,)])
+        merged = VectorCounter.merge_all([a, b])
+        self.assertEqual(merged.to_dict(), {(1, 0): 2, (2, 3): 2, (0,): 1})
+        self.assertEqual(merged.total, 5)
+
+    def test_heavy_hitters(self):
+        stream = [(i,) for i in range(1000)] + [(-1,)]*300 + [(i,) for i in range(1000, 2000)] + [(-2,)]*200
+        counter = VectorCounter(capacity=10).update(iter(stream))
+        self.assertEqual(len(counter), 10)
+        top = [vec for vec, _ in counter.most_common(2)]
+        self.assertEqual(set(top), {(-1,), (-2,)})
+        for vec in [(-1,), (-2,)]:
+            true_count = stream.count(vec)
+            self.assertGreaterEqual(counter[vec], true_count)
+            self.assertLessEqual(counter[vec] - counter.error(vec), true_count)
+
+    def test_bounded_merge(self):
+        left = [(1,)]*50 + [(i,) for i in range(100, 200)]
+        right = [(2,)]*40 + [(1,)]*10 + [(i,) for i in range(200, 300)]
+        merged = VectorCounter.merge_all([VectorCounter(5).update(left), VectorCounter(5).update(right)])
+        self.assertEqual(len(merged), 5)
+        self.assertEqual([vec for vec, _ in merged.most_common(2)], [(1,), (2,)])
+        self.assertGreaterEqual(merged[(1,)], 60)
+        self.assertLessEqual(merged[(1,)] - merged.error((1,)), 60)
+
+    def test_pickle(self):
+        import pickle
+        counter = VectorCounter(3).update([(1,), (2,), (1,)])
+        self.assertEqual(pickle.loads(pickle.dumps(counter)).to_dict(), counter.to_dict())
 
 class TestNormalize(unittest.TestCase):
     def test_nonzero_vector(self):
@@ -110,6 +198,40 @@ class TestNormalize(unittest.TestCase):
         v = [1, -2, 3, -4]
         expected = [0.18257418583505536, -0.3651483716701107, 0.5477225575051661, -0.7302967433402214]
         self.assertEqual(normalize(v), expected)
+    def test_does_not_mutate(self):
+        v = [3, 4]
+        normalize(v)
+        self.assertEqual(v, [3, 4])
+
+class TestBatchNormalize(unittest.TestCase):
+    def test_rows(self):
+        V = np.array([[3, 4], [0, 0], [0, -2]])
+        expected = [[0.6, 0.8], [0, 0], [0, -1]]
+        self.assertEqual(batch_normalize(V).tolist(), expected)
+        self.assertEqual(V.tolist(), [[3, 4], [0, 0], [0, -2]])
+
+    def test_matches_normalize(self):
+        V = np.array([[-2, -3, -4], [1, -2, 3]], dtype=float)
+        result = batch_normalize(V)
+        for row, expected in zip(result, [normalize([-2, -3, -4]), normalize([1, -2, 3])]):
+            for x, y in zip(row, expected):
+                self.assertAlmostEqual(x, y)
+
+    def test_out_and_dtype(self):
+        V = np.array([[3.0, 4.0], [1.0, 0.0]])
+        out = np.empty((2, 2), dtype=np.float32)
+        result = batch_normalize(V, out=out)
+        self.assertIs(result, out)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(batch_normalize(V, dtype=np.float32).dtype, np.float32)
+        batch_normalize(V, out=V)
+        self.assertEqual(V.tolist(), [[0.6, 0.8], [1.0, 0.0]])
+
+    def test_zero_rows(self):
+        V = np.array([[0.0, 0.0], [2.0, 0.0]])
+        self.assertTrue(np.isnan(batch_normalize(V, zero='nan')[0]).all())
+        with self.assertRaises(ValueError):
+            batch_normalize(V, zero='raise')
 
 class TestOrthogonalProjection(unittest.TestCase):
     def test_projection_same_direction(self):
@@ -120,6 +242,7 @@ class TestOrthogonalProjection(unittest.TestCase):
         x, y = orthogonal_projection(v, w)
         self.assertEqual(x, expected_x)
         self.assertEqual(y, expected_y)
+        self.assertEqual(w, [2, 4, 6])
 
     def test_projection_different_direction(self):
         v = [1, 2, 3]
@@ -145,5 +268,73 @@ class TestOrthogonalProjection(unittest.TestCase):
         x, y = orthogonal_projection(v, w)
         map(lambda x, y: self.assertAlmostEqual(x,y), expected_x, expected_y)
 
+class TestBatchOrthogonalProjection(unittest.TestCase):
+    def test_matches_orthogonal_projection(self):
+        V = [[1, 2, 3], [0, 0, 0], [-1, 5, 2]]
+        w = [4, 5, 6]
+        X, Y = batch_orthogonal_projection(V, w)
+        for v, x_row, y_row in zip(V, X, Y):
+            x, y = orthogonal_projection(v, w)
+            np.testing.assert_allclose(x_row, x, atol=1e-12)
+            np.testing.assert_allclose(y_row, y, atol=1e-12)
+
+class TestSubspaceProjector(unittest.TestCase):
+    def test_plane(self):
+        projector = SubspaceProjector([[1, 0, 0], [1, 1, 0]])
+        X, Y = projector.project([[1, 2, 3], [4, 5, 0]])
+        np.testing.assert_allclose(X, [[1, 2, 0], [4, 5, 0]], atol=1e-12)
+        np.testing.assert_allclose(Y, [[0, 0, 3], [0, 0, 0]], atol=1e-12)
+        self.assertEqual(projector.dimension, 2)
+
+    def test_perpendicular(self):
+        rng = np.random.default_rng(0)
+        basis = rng.normal(size=(3, 6))
+        V = rng.normal(size=(20, 6))
+        X, Y = project_onto_subspace(V, basis)
+        np.testing.assert_allclose(X + Y, V)
+        np.testing.assert_allclose(Y @ basis.T, 0, atol=1e-10)
+
+    def test_dependent_basis(self):
+        with self.assertRaises(ValueError):
+            SubspaceProjector([[1, 2], [2, 4]])
+        with self.assertRaises(ValueError):
+            SubspaceProjector([[1, 0], [0, 1], [1, 1]])
+
+class TestDirectionIndex(unittest.TestCase):
+    def test_collinear(self):
+        index = DirectionIndex()
+        a = index.insert([1, 2, 3])
+        b = index.insert([-2, -4, -6])
+        c = index.insert([1, 2, 4])
+        self.assertEqual(index.collinear([0.5, 1, 1.5]), [a, b])
+        self.assertEqual(index.collinear([2, 4, 8]), [c])
+        self.assertEqual(index.collinear([1, 0, 0]), [])
+
+    def test_does_not_mutate(self):
+        index = DirectionIndex()
+        v = [3, 4]
+        index.insert(v)
+        self.assertEqual(v, [3, 4])
+
+    def test_zero_vectors(self):
+        index = DirectionIndex(tol=1)
+        z = index.insert([0])
+        one = index.insert([1])
+        self.assertEqual(index.collinear([0]), [z])
+        self.assertEqual(index.collinear([5]), [one])
+
+    def test_remove_and_stats(self):
+        index = DirectionIndex()
+        a = index.insert([1, 1])
+        b = index.insert([2, 2])
+        c = index.insert([1, 0])
+        self.assertEqual(index.stats(), {'vectors': 3, 'buckets': 2, 'min_bucket': 1, 'max_bucket': 2, 'mean_bucket': 1.5})
+        index.remove(a)
+        index.remove(c)
+        self.assertEqual(index.collinear([1, 1]), [b])
+        self.assertEqual(index.stats()['buckets'], 1)
+        with self.assertRaises(KeyError):
+            index.remove(a)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
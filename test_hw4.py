@@ -1,5 +1,9 @@
+import os
 import unittest
-from hw4 import transpose, complex_multiply, multiply, rotate_matrix, is_positive_semidefinite
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import hw4
+from hw4 import SharedArray, transpose, complex_multiply, multiply, rotate_matrix, is_positive_semidefinite, CSRMatrix, transpose_view, TransposeView, matmul, batch_complex_multiply, complex_product, rotate_matrix_inplace, rotate_stack
 
 class TestMultiply(unittest.TestCase):
 
@@ -24,6 +28,167 @@ class TestMultiply(unittest.TestCase):
         expected = [14]
         self.assertEqual(multiply(M, v), expected)
 
+    def test_lists_skip_matmul(self):
+        #list inputs keep the row-dot loop; routing them through matmul made them 10x slower
+        original = hw4.matmul
+        def fail(*args, **kwargs):
+            raise AssertionError("list multiply should not call matmul")
+        hw4.matmul = fail
+        try:
+            self.assertEqual(multiply([[1, 2], [3, 4]], [1, 1]), [3, 7])
+        finally:
+            hw4.matmul = original
+
+    def test_array(self):
+        M = np.arange(6).reshape(2, 3)
+        self.assertEqual(multiply(M, [1, 2, 3]), [8, 26])
+
+    def test_process_pool(self):
+        M = np.random.default_rng(0).normal(size=(101, 17))
+        v = np.random.default_rng(1).normal(size=17)
+        np.testing.assert_allclose(multiply(M, v, workers=2, chunk_size=10), M @ v)
+        self.assertEqual(multiply([[1, 2, 3], [4, 5, 6]], [1, 2, 3], workers=2), [14, 32])
+
+    def test_process_pool_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            multiply([[1, 2, 3]], [1, 2], workers=2)
+
+    def test_shared_matrix_is_not_copied(self):
+        #a SharedArray is used in place; only the output vector gets a new block
+        M = np.random.default_rng(0).normal(size=(57, 9))
+        v = np.random.default_rng(1).normal(size=9)
+        created = []
+        def fail(cls, a):
+            raise AssertionError("a shared M should not be copied")
+        def record(cls, shape, dtype=np.float64):
+            created.append(shape)
+            return empty.__func__(cls, shape, dtype)
+        with SharedArray.from_array(M) as shared:
+            empty, from_array = SharedArray.empty, SharedArray.from_array
+            SharedArray.empty, SharedArray.from_array = classmethod(record), classmethod(fail)
+            try:
+                np.testing.assert_allclose(multiply(shared, v, workers=2), M @ v)
+            finally:
+                SharedArray.empty, SharedArray.from_array = classmethod(empty.__func__), classmethod(from_array.__func__)
+        self.assertEqual(created, [(57,)])
+
+    def test_given_executor(self):
+        M = np.random.default_rng(0).normal(size=(30, 4))
+        v = [1.0, 2.0, 3.0, 4.0]
+        with ProcessPoolExecutor(max_workers=2) as pool, SharedArray.from_array(M) as shared:
+            np.testing.assert_allclose(multiply(shared, v, executor=pool, chunk_size=7), M @ v)
+            np.testing.assert_allclose(multiply(M, v, executor=pool), M @ v)
+
+    def deleted_mappings(self, pids):
+        #shared memory blocks that were unlinked but are still mapped by one of the processes
+        lines = []
+        for pid in pids:
+            try:
+                with open('/proc/%d/maps' % pid) as f:
+                    lines += [line for line in f if 'psm_' in line and '(deleted)' in line]
+            except FileNotFoundError:
+                pass
+        return lines
+
+    @unittest.skipUnless(os.path.exists('/proc/self/maps'), "needs /proc")
+    def test_temporary_copy_is_not_kept(self):
+        M = np.random.default_rng(0).random((2000, 50))
+        v = np.ones(50)
+        np.testing.assert_allclose(multiply(M, v, workers=2), M @ v)
+        self.assertEqual(self.deleted_mappings(hw4._process_pools[2]._processes), [])
+
+    @unittest.skipUnless(os.path.exists('/proc/self/maps'), "needs /proc")
+    def test_unlinked_shared_matrix_is_released(self):
+        M = np.random.default_rng(0).random((200, 5))
+        with SharedArray.from_array(M) as shared:
+            np.testing.assert_allclose(multiply(shared, np.ones(5), workers=2), M.sum(axis=1))
+            pids = list(hw4._process_pools[2]._processes)
+        self.assertEqual(self.deleted_mappings(pids), [])
+        self.assertEqual(multiply([[1, 2]], [3, 4], workers=2), [11])
+
+    def test_pool_is_reused(self):
+        M = [[1, 2], [3, 4]]
+        multiply(M, [1, 1], workers=2)
+        pool = hw4._process_pools[2]
+        self.assertEqual(multiply(M, [1, 0], workers=2), [1, 3])
+        self.assertIs(hw4._process_pools[2], pool)
+
+class TestMatmul(unittest.TestCase):
+
+    def test_lists(self):
+        A = [[1, 2],
+             [3, 4],
+             [5, 6]]
+        B = [[1, 0, -1],
+             [2, 1, 0]]
+        expected = [[5, 2, -1],
+                    [11, 4, -3],
+                    [17, 6, -5]]
+        self.assertEqual(matmul(A, B), expected)
+
+    def test_tiled_matches_numpy(self):
+        rng = np.random.default_rng(0)
+        A = rng.normal(size=(70, 45))
+        B = rng.normal(size=(45, 33))
+        np.testing.assert_allclose(matmul(A, B, tile=16, workers=4), A @ B)
+        np.testing.assert_allclose(matmul(A, B, tile=16, workers=1), A @ B)
+        np.testing.assert_allclose(matmul(A.tolist(), B.tolist()), A @ B)
+
+    def test_default_is_one_call(self):
+        #BLAS already uses every core, so arrays are not tiled unless asked
+        A = np.arange(12.0).reshape(3, 4)
+        original = hw4._matmul_tiled
+        def fail(*args):
+            raise AssertionError("matmul should not tile by default")
+        hw4._matmul_tiled = fail
+        try:
+            np.testing.assert_array_equal(matmul(A, A.T), A @ A.T)
+        finally:
+            hw4._matmul_tiled = original
+
+    def test_thread_pool_is_reused(self):
+        A = np.random.default_rng(0).normal(size=(20, 20))
+        np.testing.assert_allclose(matmul(A, A, tile=8, workers=3), A @ A)
+        pool = hw4._thread_pools[3]
+        np.testing.assert_allclose(matmul(A, A.T, workers=3), A @ A.T)
+        self.assertIs(hw4._thread_pools[3], pool)
+
+    def test_single_column(self):
+        self.assertEqual(matmul([[1, 2], [3, 4]], [[5], [6]]), [[17], [39]])
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            matmul([[1, 2]], [[1, 2]])
+        with self.assertRaises(ValueError):
+            matmul(np.ones((2, 3)), np.ones((2, 3)))
+
+class TestCSRMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.M = [[1, 0, 2, 0],
+                  [0, 0, 0, 0],
+                  [0, 3, 0, 4]]
+        self.sparse = CSRMatrix.from_dense(self.M)
+
+    def test_round_trip(self):
+        self.assertEqual(self.sparse.nnz, 4)
+        self.assertEqual(self.sparse.shape, (3, 4))
+        self.assertEqual(self.sparse.tolist(), self.M)
+
+    def test_multiply(self):
+        v = [1, 2, 3, 4]
+        self.assertEqual(multiply(self.sparse, v), multiply(self.M, v))
+        self.assertEqual(CSRMatrix.from_dense([[0, 0]]).matvec([1, 1]).dtype, np.float64)
+
+    def test_transpose(self):
+        result = transpose(self.sparse)
+        self.assertIsInstance(result, CSRMatrix)
+        self.assertEqual(result.tolist(), transpose(self.M))
+        self.assertEqual(result.T.tolist(), self.M)
+
+    def test_bad_vector(self):
+        with self.assertRaises(ValueError):
+            self.sparse.matvec([1, 2, 3])
 
 
 class TestTranspose(unittest.TestCase):
@@ -51,6 +216,33 @@ class TestTranspose(unittest.TestCase):
                     [2],
                     [3]]
         self.assertEqual(transpose(M), expected)
+class TestTransposeView(unittest.TestCase):
+
+    def test_indexing(self):
+        M = [[1, 2, 3],
+             [4, 5, 6]]
+        view = transpose_view(M)
+        self.assertIsInstance(view, TransposeView)
+        self.assertEqual(view.shape, (3, 2))
+        self.assertEqual(view[2][0], 3)
+        self.assertEqual(view[1, 1], 5)
+        self.assertEqual(view[-1][:], [3, 6])
+        self.assertEqual(view.tolist(), transpose(M))
+        self.assertIs(view.T, M)
+
+    def test_lazy(self):
+        M = [[1, 2], [3, 4]]
+        view = transpose_view(M)
+        M[0][1] = 7
+        self.assertEqual(view, [[1, 3], [7, 4]])
+        self.assertNotEqual(view, [[1, 3], [7, 5]])
+        self.assertNotEqual(view, [[1, 3]])
+
+    def test_numpy(self):
+        M = np.arange(6).reshape(2, 3)
+        view = transpose_view(M)
+        self.assertTrue(np.shares_memory(view, M))
+        self.assertEqual(view.tolist(), transpose(M.tolist()))
 
 class TestComplexMultiply(unittest.TestCase):
     def test_complex_multiply(self):
@@ -73,6 +265,32 @@ class TestComplexMultiply(unittest.TestCase):
             z2 = (4, 11)
             expected = (-29, 23)
             self.assertEqual(complex_multiply(z1, z2), expected)
+class TestBatchComplexMultiply(unittest.TestCase):
+    def test_pairs(self):
+        Z1 = np.array([(2, 3), (0, 0), (3, -2), (1, 3)])
+        Z2 = np.array([(4, 5), (1, 2), (-1, 4), (4, 11)])
+        expected = [[-7, 22], [0, 0], [5, 14], [-29, 23]]
+        result = batch_complex_multiply(Z1, Z2)
+        self.assertEqual(result.shape, (4, 2))
+        self.assertEqual(result.tolist(), expected)
+
+    def test_complex128(self):
+        Z1 = np.array([2+3j, 3-2j])
+        Z2 = np.array([4+5j, -1+4j])
+        self.assertEqual(batch_complex_multiply(Z1, Z2).tolist(), [-7+22j, 5+14j])
+
+    def test_scalar_factor(self):
+        Z = np.array([(1, 0), (0, 1)])
+        self.assertEqual(batch_complex_multiply(Z, (0, 1)).tolist(), [[0, 1], [-1, 0]])
+
+    def test_product(self):
+        self.assertEqual(complex_product([(2, 3), (4, 5), (1, 0)]), (-7, 22))
+        phasors = np.exp(1j*np.full(1000, 0.001))
+        self.assertAlmostEqual(complex_product(phasors), np.exp(1j))
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            batch_complex_multiply(np.ones((3, 3)), np.ones((3, 2)))
 
 class TestRotateMatrix(unittest.TestCase):
     def test_rotate_matrix(self):
@@ -94,6 +312,41 @@ class TestRotateMatrix(unittest.TestCase):
                         [1, 5, 9, 13]]
             self.assertEqual(rotate_matrix(M), expected)
 
+    def test_rotate_array_is_view(self):
+            M = np.arange(9).reshape(3, 3)
+            rotated = rotate_matrix(M)
+            self.assertTrue(np.shares_memory(rotated, M))
+            self.assertEqual(rotated.tolist(), rotate_matrix(M.tolist()))
+
+class TestRotateMatrixInplace(unittest.TestCase):
+    def test_lists(self):
+        for n in range(5):
+            M = [[n*i + j for j in range(n)] for i in range(n)]
+            expected = rotate_matrix(M) if n else []
+            result = rotate_matrix_inplace(M)
+            self.assertIs(result, M)
+            self.assertEqual(M, expected)
+
+    def test_array(self):
+        for n in range(1, 6):
+            M = np.arange(n*n).reshape(n, n)
+            expected = np.rot90(M).copy()
+            self.assertIs(rotate_matrix_inplace(M), M)
+            self.assertEqual(M.tolist(), expected.tolist())
+
+    def test_not_square(self):
+        with self.assertRaises(ValueError):
+            rotate_matrix_inplace([[1, 2, 3], [4, 5, 6]])
+
+class TestRotateStack(unittest.TestCase):
+    def test_stack(self):
+        stack = np.arange(2*3*4).reshape(2, 3, 4)
+        for k in range(-2, 5):
+            result = rotate_stack(stack, k)
+            self.assertTrue(np.shares_memory(result, stack))
+            for tile, rotated in zip(stack, result):
+                self.assertEqual(rotated.tolist(), np.rot90(tile, k).tolist())
+
 
 class TestIsPositiveSemidefinite(unittest.TestCase):
 
@@ -112,6 +365,53 @@ class TestIsPositiveSemidefinite(unittest.TestCase):
         M = [[1,0,0,0],[0,0,0,0],[0,0,0,0],[0,0,0,0]]
         self.assertTrue(is_positive_semidefinite(M))
 
+    def test_rounded_covariance(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(3, 40))
+        M = X.T @ X / 3
+        M[0, 1] += 1e-14
+        self.assertTrue(is_positive_semidefinite(M))
+        self.assertFalse(is_positive_semidefinite(M - 0.1*np.eye(40)))
+
+    def test_not_square(self):
+        self.assertFalse(is_positive_semidefinite([[1, 0, 0], [0, 1, 0]]))
+        self.assertFalse(is_positive_semidefinite([1, 2]))
+
+    def test_threshold_does_not_grow_with_size(self):
+        for n in (2, 50, 500):
+            diagonal = np.linspace(1, 0.5, n)
+            diagonal[-1] = -5e-9
+            self.assertFalse(is_positive_semidefinite(np.diag(diagonal)))
+            diagonal[-1] = -5e-11
+            self.assertTrue(is_positive_semidefinite(np.diag(diagonal)))
+
+    def test_stack(self):
+        stack = np.array([np.eye(3), -np.eye(3), [[2, 1, 0], [1, 2, 0], [0, 0, 0]], [[1, 2, 0], [0, 1, 0], [0, 0, 1]]])
+        self.assertEqual(is_positive_semidefinite(stack).tolist(), [True, False, True, False])
+        self.assertEqual(is_positive_semidefinite(stack.reshape(2, 2, 3, 3)).tolist(), [[True, False], [True, False]])
+        self.assertEqual(is_positive_semidefinite(np.array([np.eye(2), np.diag([1, 0])])).tolist(), [True, True])
+
+    def test_one_bad_matrix_only_retries_its_chunk(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(40, 4, 4))
+        stack = X @ X.transpose(0, 2, 1)
+        stack[13] = -stack[13]
+        expected = [True]*40
+        expected[13] = False
+        calls = []
+        original_chunk, original_cholesky = hw4._PSD_CHUNK_MATRICES, np.linalg.cholesky
+        def cholesky(a):
+            calls.append(np.ndim(a))
+            return original_cholesky(a)
+        hw4._PSD_CHUNK_MATRICES = 8
+        np.linalg.cholesky = cholesky
+        try:
+            self.assertEqual(is_positive_semidefinite(stack).tolist(), expected)
+        finally:
+            hw4._PSD_CHUNK_MATRICES, np.linalg.cholesky = original_chunk, original_cholesky
+        #five stacked calls, then one retry per matrix of the failing chunk
+        self.assertEqual(calls, [3]*2 + [2]*8 + [3]*3)
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,321 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+import numpy as np
+import hw5
+from hw4 import CSRMatrix
+from hw5 import is_stochastic, matrix_to_dict, dict_to_matrix, stationary_states, stationary_distribution, probability_of_return, eigendecomposition, simulate_walks, MarkovChain
+class TestIsStochastic(unittest.TestCase):
+
+    def setUp(self):
+        #columns sum to 1 only up to rounding
+        self.M = np.array([[0.5, 0.2, 0.0],
+                           [0.5, 0.7, 0.5],
+                           [0.0, 0.1, 0.5]])
+
+    def test_tolerance(self):
+        self.assertTrue(is_stochastic(self.M))
+        self.assertFalse(is_stochastic(self.M, tol=0))
+        self.assertFalse(is_stochastic(self.M * 1.001))
+        self.assertFalse(is_stochastic(np.array([[1.5, 0], [-0.5, 1]])))
+        self.assertFalse(is_stochastic(np.ones((2, 3)) / 2))
+
+    def test_stack(self):
+        stack = np.array([self.M, self.M.T, np.eye(3), 2*np.eye(3)])
+        self.assertEqual(is_stochastic(stack).tolist(), [True, False, True, False])
+        self.assertEqual(is_stochastic(np.ones((2, 2, 3))).tolist(), [False, False])
+
+    def test_blocks(self):
+        for block_rows in (1, 2, 5):
+            self.assertTrue(is_stochastic(self.M, block_rows=block_rows))
+        negative = np.array([[1.5, 0], [-0.5, 1]])
+        self.assertFalse(is_stochastic(negative, block_rows=1))
+
+    def test_memmap(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'chain.dat')
+            mapped = np.memmap(path, dtype=np.float64, mode='w+', shape=(50, 50))
+            mapped[:] = 1/50
+            mapped.flush()
+            self.assertTrue(is_stochastic(np.memmap(path, dtype=np.float64, mode='r', shape=(50, 50))))
+            mapped[49, 0] = 0.5
+            mapped.flush()
+            self.assertFalse(is_stochastic(np.memmap(path, dtype=np.float64, mode='r', shape=(50, 50)), block_rows=7))
+            del mapped
+
+    def test_sparse(self):
+        self.assertTrue(is_stochastic(CSRMatrix.from_dense(self.M)))
+        self.assertFalse(is_stochastic(CSRMatrix.from_dense(self.M.T)))
+
+class TestMatrixToDict(unittest.TestCase):
+
+    def test_dense(self):
+        M = np.array([[0.5, 0],
+                      [0.5, 1]])
+        expected = {0: [(0, 0.5), (1, 0.5)], 1: [(0, 0), (1, 1)]}
+        self.assertEqual(matrix_to_dict(M), expected)
+
+    def test_sparse(self):
+        M = np.array([[0.5, 0, 0],
+                      [0.5, 0, 1],
+                      [0, 1, 0]])
+        expected = {0: [(0, 0.5), (1, 0.5)], 1: [(2, 1.0)], 2: [(1, 1.0)]}
+        self.assertEqual(matrix_to_dict(CSRMatrix.from_dense(M)), expected)
+
+    def test_compact(self):
+        M = np.array([[0.5, 0, 0],
+                      [0.5, 0, 1],
+                      [0, 1, 0]])
+        for source in (M, CSRMatrix.from_dense(M)):
+            d = matrix_to_dict(source, sparse=True)
+            self.assertEqual(sorted(d), [0, 1, 2])
+            self.assertEqual(d[0][0].tolist(), [0, 1])
+            self.assertEqual(d[0][1].tolist(), [0.5, 0.5])
+            self.assertEqual(d[1][0].tolist(), [2])
+
+class TestDictToMatrix(unittest.TestCase):
+
+    def test_round_trip(self):
+        M = np.array([[0.5, 0, 0.25],
+                      [0.5, 0, 0.25],
+                      [0, 1, 0.5]])
+        for sparse in (False, True):
+            result = dict_to_matrix(matrix_to_dict(M, sparse=sparse))
+            self.assertIsInstance(result, CSRMatrix)
+            self.assertEqual(result.nnz, 6)
+            self.assertEqual(result.tolist(), M.tolist())
+
+    def test_missing_columns_and_shape(self):
+        d = {0: [(1, 1.0)], 2: [(0, 0.0), (3, 1.0)]}
+        result = dict_to_matrix(d)
+        self.assertEqual(result.shape, (4, 4))
+        self.assertEqual(result.nnz, 2)
+        self.assertEqual(dict_to_matrix(d, shape=(5, 3)).shape, (5, 3))
+        with self.assertRaises(ValueError):
+            dict_to_matrix(d, shape=(3, 3))
+
+
+class TestStationaryDistribution(unittest.TestCase):
+
+    def setUp(self):
+        self.M = np.array([[0.5, 0.2, 0.0],
+                           [0.5, 0.7, 0.5],
+                           [0.0, 0.1, 0.5]])
+        self.expected = stationary_states(self.M)[0]
+
+    def test_power(self):
+        result = stationary_distribution(self.M, 'power', tol=1e-14)
+        self.assertTrue(result.converged)
+        self.assertGreater(result.iterations, 1)
+        self.assertLess(result.residual, 1e-12)
+        np.testing.assert_allclose(result.distribution, self.expected)
+
+    def test_solve(self):
+        np.testing.assert_allclose(stationary_distribution(self.M, 'solve').distribution, self.expected)
+        np.testing.assert_allclose(stationary_states(self.M, method='solve')[0], self.expected)
+
+    def test_sparse(self):
+        sparse = CSRMatrix.from_dense(self.M)
+        np.testing.assert_allclose(stationary_distribution(sparse, 'power', tol=1e-14).distribution, self.expected)
+
+    @unittest.skipUnless(importlib.util.find_spec('scipy'), 'needs scipy')
+    def test_sparse_solve(self):
+        sparse = CSRMatrix.from_dense(self.M)
+        np.testing.assert_allclose(stationary_distribution(sparse, 'solve').distribution, self.expected)
+
+    def test_periodic_chain(self):
+        M = np.array([[0, 0, 1],
+                      [1, 0, 0],
+                      [0, 1, 0]])
+        result = stationary_distribution(M, x0=[1, 0, 0])
+        self.assertTrue(result.converged)
+        np.testing.assert_allclose(result.distribution, [1/3, 1/3, 1/3])
+
+    def test_not_converged(self):
+        result = stationary_distribution(self.M, max_iter=2)
+        self.assertFalse(result.converged)
+        self.assertEqual(result.iterations, 2)
+
+    def test_bad_method(self):
+        with self.assertRaises(ValueError):
+            stationary_distribution(self.M, 'eig')
+
+
+class TestProbabilityOfReturn(unittest.TestCase):
+
+    def setUp(self):
+        self.tetrahedron = 1/3*(np.ones((4, 4)) - np.eye(4))
+
+    def test_scalar(self):
+        self.assertEqual(probability_of_return(0), 1)
+        self.assertAlmostEqual(probability_of_return(1), 0)
+        self.assertAlmostEqual(probability_of_return(2), 1/3)
+        self.assertIsInstance(probability_of_return(5), float)
+
+    def test_many_steps(self):
+        steps = np.arange(30)
+        expected = [np.linalg.matrix_power(self.tetrahedron, n)[0, 0] for n in steps]
+        np.testing.assert_allclose(probability_of_return(steps), expected, atol=1e-15)
+        np.testing.assert_allclose(probability_of_return(steps, self.tetrahedron), expected, atol=1e-15)
+
+    def test_general_chain(self):
+        M = np.array([[0.5, 0.2, 0.0],
+                      [0.5, 0.7, 0.5],
+                      [0.0, 0.1, 0.5]])
+        steps = np.array([[0, 1], [7, 40]])
+        for start in range(3):
+            expected = [[np.linalg.matrix_power(M, n)[start, start] for n in row] for row in steps]
+            np.testing.assert_allclose(probability_of_return(steps, M, start), expected)
+
+    def test_not_diagonalizable(self):
+        M = np.array([[1, 1],
+                      [0, 1]])
+        self.assertEqual(probability_of_return([0, 3], M, 1).tolist(), [1, 1])
+
+    def test_given_decomposition(self):
+        M = np.array([[0.5, 0.2, 0.0],
+                      [0.5, 0.7, 0.5],
+                      [0.0, 0.1, 0.5]])
+        steps = np.arange(20)
+        expected = probability_of_return(steps, M, 2)
+        decomposition = eigendecomposition(M)
+        original = hw5._cached_eigendecomposition
+        def fail(M):
+            raise AssertionError("a given decomposition should not be looked up")
+        hw5._cached_eigendecomposition = fail
+        try:
+            np.testing.assert_allclose(probability_of_return(steps, M, 2, decomposition), expected)
+        finally:
+            hw5._cached_eigendecomposition = original
+
+    def test_cache_is_bounded_by_bytes(self):
+        original = hw5.EIGEN_CACHE_MAX_BYTES
+        rng = np.random.default_rng(0)
+        matrices = [rng.random((20, 20)) for _ in range(5)]
+        entry = hw5._decomposition_bytes(eigendecomposition(matrices[0]))
+        hw5.EIGEN_CACHE_MAX_BYTES = 2*entry
+        try:
+            hw5._eigen_cache.clear()
+            hw5._eigen_cache_bytes = 0
+            for M in matrices:
+                M = M / M.sum(axis=0)
+                np.testing.assert_allclose(probability_of_return([3], M), np.linalg.matrix_power(M, 3)[0, 0])
+            self.assertEqual(len(hw5._eigen_cache), 2)
+            self.assertLessEqual(hw5._eigen_cache_bytes, hw5.EIGEN_CACHE_MAX_BYTES)
+        finally:
+            hw5.EIGEN_CACHE_MAX_BYTES = original
+
+    def test_negative_steps(self):
+        with self.assertRaises(ValueError):
+            probability_of_return([-1, 2])
+
+
+class TestSimulateWalks(unittest.TestCase):
+
+    def setUp(self):
+        self.M = np.array([[0.5, 0.25, 0.0],
+                           [0.5, 0.5, 0.5],
+                           [0.0, 0.25, 0.5]])
+
+    def test_matches_probability_of_return(self):
+        tetrahedron = 1/3*(np.ones((4, 4)) - np.eye(4))
+        walkers = 100000
+        for steps in (1, 2, 3):
+            result = simulate_walks(tetrahedron, walkers, steps, rng=steps)
+            self.assertAlmostEqual(result.occupancy[0] / walkers, probability_of_return(steps), delta=0.01)
+
+    def test_stationary_occupancy(self):
+        result = simulate_walks(self.M, 50000, 40, start=2, rng=np.random.default_rng(0))
+        self.assertEqual(result.occupancy.sum(), 50000)
+        self.assertEqual(result.visits.sum(), 50000*40)
+        np.testing.assert_allclose(result.occupancy / 50000, stationary_states(self.M)[0], atol=0.02)
+
+    def test_return_times(self):
+        result = simulate_walks(self.M, 20000, 200, start=0, rng=1)
+        self.assertTrue(np.all(result.first_return != 0))
+        self.assertGreater(result.returned_fraction, 0.99)
+        #Kac's lemma: the mean return time to a state is 1 / its stationary probability
+        self.assertAlmostEqual(result.mean_return_time, 4, delta=0.2)
+
+    def test_seeded(self):
+        first = simulate_walks(self.M, 100, 10, start=[0, 1]*50, rng=7)
+        second = simulate_walks(self.M, 100, 10, start=[0, 1]*50, rng=7)
+        self.assertEqual(first.first_return.tolist(), second.first_return.tolist())
+
+    def test_sparse(self):
+        result = simulate_walks(CSRMatrix.from_dense(self.M), 20000, 30, start=1, rng=2)
+        np.testing.assert_allclose(result.occupancy / 20000, stationary_states(self.M)[0], atol=0.02)
+
+    def test_not_stochastic(self):
+        with self.assertRaises(ValueError):
+            simulate_walks(np.array([[0.5, 0.5], [0.4, 0.5]]), 10, 1)
+
+
+class TestMarkovChain(unittest.TestCase):
+
+    def setUp(self):
+        self.M = np.array([[0.5, 0.2, 0.0],
+                           [0.5, 0.7, 0.5],
+                           [0.0, 0.1, 0.5]])
+        self.x0 = np.array([1.0, 0.0, 0.0])
+
+    def test_distribution(self):
+        chain = MarkovChain(self.M)
+        for n in (0, 1, 2, 5, 13, 64, np.int64(100)):
+            expected = np.linalg.matrix_power(self.M, int(n)) @ self.x0
+            np.testing.assert_allclose(chain.distribution(n, self.x0), expected)
+            np.testing.assert_allclose(chain.power(n), np.linalg.matrix_power(self.M, int(n)))
+        self.assertEqual(sorted(chain.cache_info()['squares']), [1, 2, 3, 4, 5, 6])
+
+    def test_memory_cap(self):
+        chain = MarkovChain(self.M, max_cache_bytes=2*self.M.nbytes)
+        np.testing.assert_allclose(chain.distribution(1023, self.x0), np.linalg.matrix_power(self.M, 1023) @ self.x0)
+        info = chain.cache_info()
+        self.assertLessEqual(info['bytes'], info['max_bytes'])
+        self.assertEqual(info['squares'], [8, 9])
+
+    def test_update_invalidates(self):
+        chain = MarkovChain(self.M)
+        chain.distribution(8, self.x0)
+        chain.update(0, 1, 0.1)
+        chain.update(2, 1, 0.2)
+        self.assertEqual(chain.cache_info()['squares'], [])
+        M = self.M.copy()
+        M[0, 1], M[2, 1] = 0.1, 0.2
+        np.testing.assert_allclose(chain.distribution(8, self.x0), np.linalg.matrix_power(M, 8) @ self.x0)
+        self.assertTrue(chain.is_stochastic())
+        with self.assertRaises(ValueError):
+            chain.matrix[0, 0] = 1
+
+    def test_probability_of_return(self):
+        tetrahedron = MarkovChain(1/3*(np.ones((4, 4)) - np.eye(4)))
+        for n in range(10):
+            self.assertAlmostEqual(tetrahedron.probability_of_return(n), probability_of_return(n))
+        np.testing.assert_allclose(tetrahedron.stationary().distribution, [0.25]*4)
+
+    def test_probability_of_return_many_steps(self):
+        chain = MarkovChain(self.M)
+        steps = np.arange(12)
+        expected = [np.linalg.matrix_power(self.M, n)[1, 1] for n in steps]
+        np.testing.assert_allclose(chain.probability_of_return(steps, 1), expected)
+        info = chain.cache_info()
+        self.assertTrue(info['decomposition'])
+        self.assertEqual(info['bytes'], hw5._decomposition_bytes(chain.eigendecomposition()))
+        chain.update(0, 0, 0.5)
+        self.assertFalse(chain.cache_info()['decomposition'])
+        shear = MarkovChain([[1, 1], [0, 1]])
+        self.assertEqual(shear.probability_of_return([0, 3], 1).tolist(), [1, 1])
+
+    def test_decomposition_counts_against_budget(self):
+        size = hw5._decomposition_bytes(eigendecomposition(self.M))
+        chain = MarkovChain(self.M, max_cache_bytes=size + self.M.nbytes)
+        chain.eigendecomposition()
+        chain.distribution(4, self.x0)
+        info = chain.cache_info()
+        self.assertLessEqual(info['bytes'], info['max_bytes'])
+        self.assertEqual(info['squares'], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import pandas as pd
+import hw7
+from hw7 import read_csv_cached, clear_csv_cache, get_emissions_sum, load_emissions_store
+
+class TestReadCsvCached(unittest.TestCase):
+
+    def setUp(self):
+        clear_csv_cache()
+        self.directory = tempfile.mkdtemp()
+        self.path = self.write('data.csv', 'a,b\n1,2\n3,4\n')
+
+    def tearDown(self):
+        clear_csv_cache()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_cache_hit(self):
+        first = read_csv_cached(self.path)
+        original = pd.read_csv
+        def fail(*args, **kwargs):
+            raise AssertionError("a cached file should not be parsed again")
+        pd.read_csv = fail
+        try:
+            pd.testing.assert_frame_equal(read_csv_cached(self.path), first)
+        finally:
+            pd.read_csv = original
+        self.assertEqual(first['b'].tolist(), [2, 4])
+
+    def test_returned_frame_can_be_modified(self):
+        first = read_csv_cached(self.path)
+        first['c'] = first['a'] + first['b']
+        first.loc[0, 'a'] = 100
+        first.drop(columns='b', inplace=True)
+        again = read_csv_cached(self.path)
+        self.assertEqual(list(again.columns), ['a', 'b'])
+        self.assertEqual(again['a'].tolist(), [1, 3])
+
+    def test_mtime_change(self):
+        read_csv_cached(self.path)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        parsed = []
+        original = pd.read_csv
+        def record(*args, **kwargs):
+            parsed.append(args[0])
+            return original(*args, **kwargs)
+        pd.read_csv = record
+        try:
+            read_csv_cached(self.path)
+        finally:
+            pd.read_csv = original
+        self.assertEqual(parsed, [self.path])
+        #the older version is dropped, not kept next to the new one
+        self.assertEqual([key[0] for key in hw7._csv_cache], [os.path.abspath(self.path)])
+
+    def test_size_change(self):
+        read_csv_cached(self.path)
+        stat = os.stat(self.path)
+        self.write('data.csv', 'a,b\n1,2\n3,4\n5,6\n')
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(read_csv_cached(self.path)['a'].tolist(), [1, 3, 5])
+
+    def test_lru_eviction(self):
+        paths = [self.write('%d.csv' % i, 'a\n%d\n' % i) for i in range(3)]
+        size = int(read_csv_cached(paths[0]).memory_usage(deep=True).sum())
+        original = hw7.CSV_CACHE_MAX_BYTES
+        hw7.CSV_CACHE_MAX_BYTES = 2*size
+        try:
+            clear_csv_cache()
+            read_csv_cached(paths[0])
+            read_csv_cached(paths[1])
+            read_csv_cached(paths[0])
+            read_csv_cached(paths[2])
+            #paths[1] was used least recently
+            cached = [key[0] for key in hw7._csv_cache]
+            self.assertEqual(cached, [os.path.abspath(paths[0]), os.path.abspath(paths[2])])
+            self.assertLessEqual(hw7._csv_cache_bytes, hw7.CSV_CACHE_MAX_BYTES)
+        finally:
+            hw7.CSV_CACHE_MAX_BYTES = original
+
+    def read_pickle_sidecar(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return read_csv_cached(self.path, sidecar='pickle', allow_pickle=True)
+
+    def sidecar(self, fmt='pickle'):
+        return hw7._sidecar_path(hw7._file_key(self.path), fmt)
+
+    def test_sidecar_round_trip(self):
+        expected = self.read_pickle_sidecar()
+        self.assertTrue(os.path.exists(self.sidecar()))
+        self.assertEqual([name for name in os.listdir(self.directory) if name.endswith('.tmp')], [])
+        clear_csv_cache()
+        original = pd.read_csv
+        def fail(*args, **kwargs):
+            raise AssertionError("the sidecar should be read instead of the CSV")
+        pd.read_csv = fail
+        try:
+            pd.testing.assert_frame_equal(self.read_pickle_sidecar(), expected)
+        finally:
+            pd.read_csv = original
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        expected = read_csv_cached(self.path, sidecar='parquet')
+        clear_csv_cache()
+        pd.testing.assert_frame_equal(read_csv_cached(self.path, sidecar='parquet'), expected)
+
+    def test_corrupt_sidecar(self):
+        self.read_pickle_sidecar()
+        with open(self.sidecar(), 'wb') as f:
+            f.write(b'\x80\x04\x95')
+        clear_csv_cache()
+        self.assertEqual(self.read_pickle_sidecar()['a'].tolist(), [1, 3])
+        #the broken sidecar was replaced by a good one
+        self.assertEqual(pd.read_pickle(self.sidecar())['a'].tolist(), [1, 3])
+
+    def test_missing_engine_keeps_sidecar(self):
+        self.read_pickle_sidecar()
+        clear_csv_cache()
+        #a process without the engine can neither read nor write the sidecar
+        read, write = pd.read_pickle, pd.DataFrame.to_pickle
+        def missing(*args, **kwargs):
+            raise ImportError("no engine")
+        pd.read_pickle = pd.DataFrame.to_pickle = missing
+        try:
+            self.assertEqual(self.read_pickle_sidecar()['a'].tolist(), [1, 3])
+        finally:
+            pd.read_pickle, pd.DataFrame.to_pickle = read, write
+        self.assertTrue(os.path.exists(self.sidecar()))
+
+    def test_pickle_is_opt_in(self):
+        with self.assertRaises(ValueError):
+            read_csv_cached(self.path, sidecar='pickle')
+        with self.assertWarns(UserWarning):
+            read_csv_cached(self.path, sidecar='pickle', allow_pickle=True)
+
+    def test_only_old_sidecars_are_removed(self):
+        old = self.write('data.csv.1-2.pickle', '')
+        other = self.write('data.csv.notes.pickle', '')
+        self.read_pickle_sidecar()
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(other))
+
+class TestGetEmissionsSum(unittest.TestCase):
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'co2emissions.csv')
+
+    def setUp(self):
+        clear_csv_cache()
+        self.data = pd.read_csv(self.path)
+
+    def tearDown(self):
+        clear_csv_cache()
+
+    def baseline(self, L1, L2):
+        #the pandas expression get_emissions_sum replaced
+        data = self.data
+        return data[L2].sum(axis=1)[data['Country Name'].isin(L1)].sum()
+
+    def test_matches_pandas(self):
+        L1 = ['Aruba', 'Canada', 'India', 'United States']
+        L2 = ['1960', '1990', '2014']
+        self.assertAlmostEqual(get_emissions_sum(self.path, L1, L2), self.baseline(L1, L2), delta=1e-6)
+
+    def test_unknown_countries_ignored(self):
+        L1 = ['Canada', 'Atlantis', 'India']
+        L2 = ['2000']
+        self.assertAlmostEqual(get_emissions_sum(self.path, L1, L2), self.baseline(L1, L2), delta=1e-6)
+        self.assertEqual(get_emissions_sum(self.path, ['Atlantis'], L2), 0.0)
+
+    def test_repeated_years(self):
+        L1 = ['Canada', 'India']
+        L2 = ['2000', '2000', '2010']
+        expected = self.baseline(L1, L2)
+        self.assertAlmostEqual(get_emissions_sum(self.path, L1, L2), expected, delta=1e-6)
+        self.assertAlmostEqual(expected, 2*self.baseline(L1, ['2000']) + self.baseline(L1, ['2010']), delta=1e-6)
+
+    def test_nan_counts_as_zero(self):
+        #Aruba has no data before 1986
+        self.assertTrue(self.data.loc[self.data['Country Name'] == 'Aruba', '1960'].isna().all())
+        L1 = ['Aruba', 'Canada']
+        L2 = ['1960', '1990']
+        self.assertAlmostEqual(get_emissions_sum(self.path, L1, L2), self.baseline(L1, L2), delta=1e-6)
+        self.assertEqual(get_emissions_sum(self.path, ['Aruba'], ['1960']), 0.0)
+
+    def test_int_years(self):
+        L1 = ['Canada', 'India']
+        self.assertAlmostEqual(get_emissions_sum(self.path, L1, [1990, 2014]),
+                               self.baseline(L1, ['1990', '2014']), delta=1e-6)
+
+    def test_store_is_cached_and_cleared(self):
+        store = load_emissions_store(self.path)
+        self.assertIs(load_emissions_store(self.path), store)
+        self.assertLessEqual(store.values.nbytes, hw7._csv_cache_bytes)
+        clear_csv_cache()
+        self.assertEqual(hw7._csv_cache_bytes, 0)
+        self.assertIsNot(load_emissions_store(self.path), store)
+
+    def test_store_counts_against_budget(self):
+        original = hw7.CSV_CACHE_MAX_BYTES
+        hw7.CSV_CACHE_MAX_BYTES = 1
+        try:
+            store = load_emissions_store(self.path)
+            self.assertIsNot(load_emissions_store(self.path), store)
+            self.assertEqual(len(hw7._csv_cache), 0)
+        finally:
+            hw7.CSV_CACHE_MAX_BYTES = original
+
+if __name__ == '__main__':
+    unittest.main()